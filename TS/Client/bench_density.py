@@ -0,0 +1,184 @@
+# bench_density.py
+
+import argparse
+import itertools
+import json
+import os
+import subprocess
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from thread_limits import available_cpus, thread_env
+
+POLICIES = ('default', 'pinned')
+
+
+def load_clip(path, width, height, max_frames):
+    """
+    Load up to `max_frames` frames of a hand image or video, resized to the camera resolution.
+
+    Without a hand in view MediaPipe only runs palm detection, never the
+    landmark model, so the benchmark needs real footage to measure the
+    cost of a playing client.
+    """
+    from evaluate import video_frames
+
+    image = cv2.imread(path)
+    if image is not None:
+        images = [image]
+    else:
+        images = [frame for _, frame in itertools.islice(video_frames(path), max_frames)]
+    if not images:
+        raise ValueError(f"No frames could be read from {path}")
+    return [cv2.resize(image, (width, height)) for image in images]
+
+
+def run_client(clip, fps, seconds, start_at, threads, cpus, width, height, clip_frames, warmup=1.0):
+    """
+    One client's frame loop against a simulated camera playing `clip` in a loop.
+
+    Frames are captured on a fixed fps grid. Like CaptureDevice, the client
+    always takes the newest frame when it is ready and drops the ones it
+    missed. Frame latency runs from a frame's capture to the end of its
+    process_frame call.
+    """
+    from gesture_detection import GestureDetector
+
+    detector = GestureDetector(num_threads=threads, cpus=cpus)
+    frames = load_clip(clip, width, height, clip_frames)
+
+    interval = 1.0 / fps
+    while time.time() < start_at:
+        time.sleep(0.001)
+    # All clients share the wall-clock start; perf_counter gives the precise intervals
+    origin = time.perf_counter()
+    latencies = []
+    processed = 0
+    dropped = 0
+    hands = 0
+    last_index = -1
+    while True:
+        now = time.perf_counter() - origin
+        if now >= warmup + seconds:
+            break
+        index = int(now / interval)
+        if index == last_index:
+            # Wait for the next capture
+            time.sleep((index + 1) * interval - now)
+            index += 1
+        if now >= warmup and last_index >= 0:
+            dropped += max(0, index - last_index - 1)
+        last_index = index
+        capture_time = index * interval
+        detector.process_frame(frames[index % len(frames)])
+        done = time.perf_counter() - origin
+        if capture_time >= warmup:
+            latencies.append(done - capture_time)
+            processed += 1
+            hands += detector.frame_gesture != 'None'
+    detector.release()
+    return {'latencies': latencies, 'processed': processed, 'dropped': dropped, 'hands': hands}
+
+
+def run_level(clip, clients, policy, cpus, threads, fps, seconds, width, height, clip_frames):
+    """
+    Run `clients` client processes at once.
+
+    :param policy: 'default' leaves thread pools and affinity alone; 'pinned' caps each
+        client to `threads` threads (through its environment, so numpy and MediaPipe
+        see the cap when they load) and pins it to one CPU, round robin
+    :return: Dict with the latency percentiles over all clients' frames, fps, drop rate and
+        the share of frames with a hand found
+    """
+    start_at = time.time() + 2.0 + 0.05 * clients  # Let every client import and build its graph
+    processes = []
+    for i in range(clients):
+        command = [sys.executable, __file__, '--client', '--clip', clip, '--clip-frames', str(clip_frames),
+                   '--fps', str(fps), '--seconds', str(seconds),
+                   '--start-at', repr(start_at), '--width', str(width), '--height', str(height)]
+        env = None
+        if policy == 'pinned':
+            command += ['--threads', str(threads), '--cpu', str(cpus[i % len(cpus)])]
+            env = dict(os.environ, **thread_env(threads))
+        processes.append(subprocess.Popen(command, stdout=subprocess.PIPE, text=True, env=env))
+
+    latencies = []
+    processed = dropped = hands = 0
+    for process in processes:
+        output, _ = process.communicate()
+        if process.returncode != 0:
+            raise RuntimeError(f"Client exited with code {process.returncode}")
+        r = json.loads(output)
+        latencies.extend(r['latencies'])
+        processed += r['processed']
+        dropped += r['dropped']
+        hands += r['hands']
+
+    latencies = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        'p50': float(np.percentile(latencies, 50)),
+        'p99': float(np.percentile(latencies, 99)),
+        'fps': processed / seconds / clients,
+        'drop_rate': dropped / max(1, processed + dropped),
+        'hand_rate': hands / max(1, processed),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure p99 frame latency as clients per core grow. Results only describe the machine "
+                    "and MediaPipe build the benchmark ran on.")
+    parser.add_argument("--clip", required=True,
+                        help="Hand image or video each client loops over, e.g. a clip from the evaluate corpus")
+    parser.add_argument("--clip-frames", type=int, default=60, help="Frames of the clip each client holds in memory")
+    parser.add_argument("--clients-per-core", type=float, nargs="+", default=[1, 2, 4, 8], help="Densities to test")
+    parser.add_argument("--cpus", type=int, help="Cores to use (default: all this process may run on)")
+    parser.add_argument("--policy", choices=POLICIES + ('both',), default='both', help="Thread policy")
+    parser.add_argument("--threads", type=int, default=1, help="Threads per client under the pinned policy")
+    parser.add_argument("--fps", type=int, default=30, help="Camera frame rate per client")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Measured seconds per density")
+    parser.add_argument("--width", type=int, default=640, help="Frame width")
+    parser.add_argument("--height", type=int, default=480, help="Frame height")
+    parser.add_argument("--latency-budget", type=float, default=0.1, help="p99 frame latency (s) a client may have")
+    parser.add_argument("--client", action="store_true", help="Run a single client (internal)")
+    parser.add_argument("--start-at", type=float, help="Wall-clock start time (internal)")
+    parser.add_argument("--cpu", type=int, help="CPU to pin a single client to (internal)")
+    args = parser.parse_args()
+
+    if args.client:
+        threads = args.threads if args.cpu is not None else None
+        cpus = [args.cpu] if args.cpu is not None else None
+        print(json.dumps(run_client(args.clip, args.fps, args.seconds, args.start_at, threads, cpus,
+                                    args.width, args.height, args.clip_frames)))
+        return
+
+    cpus = available_cpus()
+    if args.cpus:
+        cpus = cpus[:args.cpus]
+    policies = POLICIES if args.policy == 'both' else (args.policy,)
+    print(f"{len(cpus)} cores, {args.fps} fps per client, latency budget {args.latency_budget * 1000:.0f} ms")
+    print(f"{'policy':<9}{'clients/core':>13}{'clients':>9}{'p50 ms':>9}{'p99 ms':>9}{'fps/client':>12}{'dropped':>9}"
+          f"{'hands':>7}")
+    hand_rate = 1.0
+    for policy in policies:
+        capacity = 0
+        for density in args.clients_per_core:
+            clients = max(1, round(density * len(cpus)))
+            r = run_level(args.clip, clients, policy, cpus, args.threads, args.fps, args.seconds,
+                          args.width, args.height, args.clip_frames)
+            print(f"{policy:<9}{density:>13g}{clients:>9}{r['p50'] * 1000:>9.1f}{r['p99'] * 1000:>9.1f}"
+                  f"{r['fps']:>12.1f}{r['drop_rate']:>9.1%}{r['hand_rate']:>7.0%}")
+            hand_rate = min(hand_rate, r['hand_rate'])
+            if r['p99'] <= args.latency_budget:
+                capacity = max(capacity, clients)
+        print(f"{policy}: up to {capacity} clients within the p99 budget on {len(cpus)} cores (this host only)")
+    if hand_rate < 0.5:
+        print(f"Warning: a hand was found in only {hand_rate:.0%} of frames; without one the landmark model "
+              f"does not run and latencies understate a playing client.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# bench_frame_path.py
+
+import argparse
+import json
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import cv2
+import numpy as np
+
+from frame_buffers import FrameBuffers, mirror_frame, preprocess_for_inference
+
+
+def allocating_path(frame, buffers):
+    """
+    The original frame path: every step returns a freshly allocated frame.
+    """
+    flipped = cv2.flip(frame, 1)
+    resized = cv2.resize(flipped, (640, 480))
+    image_rgb = cv2.cvtColor(resized, cv2.COLOR_BGR2RGB)
+    return [flipped, resized, image_rgb, cv2.GaussianBlur(image_rgb, (5, 5), 0)]
+
+
+def preallocated_path(frame, buffers):
+    """
+    The current frame path: resize only if the camera refused 640x480 (as CaptureDevice.read
+    does), then every step writes into a reused buffer.
+    """
+    outputs = []
+    if frame.shape[:2] != (480, 640):
+        frame = cv2.resize(frame, (640, 480), dst=buffers.get('resize', (480, 640, 3)))
+        outputs.append(frame)
+    mirrored = mirror_frame(frame, buffers)
+    return outputs + [mirrored, preprocess_for_inference(mirrored, buffers)]
+
+
+PATHS = {
+    'allocating': allocating_path,
+    'preallocated': preallocated_path,
+}
+
+
+def run(path_name, frames, width, height):
+    """
+    Run one frame path and measure allocations, transient memory and per-frame time.
+
+    Allocations are counted as output frames that are not backed by one of the
+    reused FrameBuffers arrays.
+    """
+    path = PATHS[path_name]
+    rng = np.random.default_rng(0)
+    source = rng.integers(0, 256, (height, width, 3), dtype=np.uint8)
+    buffers = FrameBuffers()
+
+    # Warm up so one-time buffer allocation is not counted as steady state
+    for _ in range(10):
+        path(source, buffers)
+    owned = {b.__array_interface__['data'][0] for b in buffers.buffers.values()}
+
+    new_arrays = 0
+    times = []
+    tracemalloc.start()
+    peak_transient = 0
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+        outputs = path(source, buffers)
+        times.append(time.perf_counter() - start)
+        peak_transient = max(peak_transient, tracemalloc.get_traced_memory()[1] - base)
+        new_arrays += sum(1 for out in outputs if out.__array_interface__['data'][0] not in owned)
+        del outputs
+    tracemalloc.stop()
+
+    times.sort()
+    return {
+        'path': path_name,
+        'allocations_per_frame': new_arrays / frames,
+        'peak_transient_bytes': peak_transient,
+        'peak_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        'median_ms': statistics.median(times) * 1000,
+        'p99_ms': times[int(len(times) * 0.99)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the per-frame preprocessing path.")
+    parser.add_argument("--frames", type=int, default=2000, help="Frames per path")
+    parser.add_argument("--width", type=int, default=640, help="Source frame width")
+    parser.add_argument("--height", type=int, default=480, help="Source frame height")
+    parser.add_argument("--path", choices=sorted(PATHS), help="Run a single path in this process (internal)")
+    args = parser.parse_args()
+
+    if args.path:
+        print(json.dumps(run(args.path, args.frames, args.width, args.height)))
+        return
+
+    # Each path runs in its own process so peak RSS is not shared between them
+    print(f"{'path':<14}{'allocs/frame':>14}{'transient KiB':>15}{'peak RSS MiB':>14}{'median ms':>11}{'p99 ms':>9}")
+    for path_name in PATHS:
+        output = subprocess.run(
+            [sys.executable, __file__, '--path', path_name, '--frames', str(args.frames),
+             '--width', str(args.width), '--height', str(args.height)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        r = json.loads(output)
+        print(f"{r['path']:<14}{r['allocations_per_frame']:>14.1f}{r['peak_transient_bytes'] / 1024:>15.0f}"
+              f"{r['peak_rss_kb'] / 1024:>14.1f}{r['median_ms']:>11.3f}{r['p99_ms']:>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# bench_state_sync.py
+
+import argparse
+import json
+import random
+import uuid
+
+from state_sync import StateSync
+
+OUTCOMES = ('You Win!', 'You Lose!', 'Tie')
+
+
+def packet_size(event, payload):
+    """
+    Size of a Socket.IO event packet as the server encodes it (type prefix + JSON array).
+    """
+    return len('42') + len(json.dumps([event, payload], separators=(',', ':')))
+
+
+class ScoreServer:
+    """
+    Python model of the score bookkeeping in TS/Server/gameManager.js, used to size
+    payloads without running the server.
+    """
+
+    def __init__(self, players):
+        self.scores = {p: {'score': 0, 'wins': 0, 'losses': 0, 'ties': 0} for p in players}
+        self.synced = {p: dict(s) for p, s in self.scores.items()}
+        self.version = 0
+        self.round = 0
+
+    def play_round(self, rng, response_rate):
+        self.round += 1
+        results = {}
+        for player_id, entry in self.scores.items():
+            if rng.random() >= response_rate:
+                continue
+            outcome = rng.choice(OUTCOMES)
+            if outcome == 'You Win!':
+                entry['score'] += 1
+                entry['wins'] += 1
+            elif outcome == 'You Lose!':
+                entry['losses'] += 1
+            else:
+                entry['ties'] += 1
+            results[player_id] = {'round': self.round, 'result_text': outcome,
+                                  'round_score': round(rng.uniform(0, 100), 6)}
+        return results
+
+    def full_table(self):
+        return {'scores': [dict(player_id=p, **s) for p, s in self.scores.items()]}
+
+    def results_list(self, results):
+        return {'results': [{'player_id': p, 'result_text': r['result_text'], 'round_score': r['round_score']}
+                            for p, r in results.items()]}
+
+    def delta(self, changed_players):
+        scores = {}
+        for player_id in changed_players:
+            current, synced = self.scores[player_id], self.synced[player_id]
+            scores[player_id] = {k: v for k, v in current.items() if synced[k] != v}
+            self.synced[player_id] = dict(current)
+        self.version += 1
+        return {'base': self.version - 1, 'version': self.version, 'round': self.round, 'scores': scores}
+
+    def snapshot(self):
+        return {'version': self.version, 'round': self.round, 'scores': self.synced}
+
+
+def measure(players, rounds, response_rate, drop_rate, seed=0):
+    """
+    Bytes each client receives per round under each scheme, and a replica consistency check.
+
+    legacy:   one full score table per scored response plus one per round, and the result list
+    snapshot: one full score table and the result list per round
+    delta:    one state_delta per round (plus resync snapshots for dropped deltas) and,
+              for players who responded, their own round_result
+    """
+    rng = random.Random(seed)
+    player_ids = [str(uuid.UUID(int=rng.getrandbits(128), version=4)) for _ in range(players)]
+    server = ScoreServer(player_ids)
+    replica = StateSync()
+    replica.apply_snapshot(server.snapshot())
+
+    totals = {'legacy': 0, 'snapshot': 0, 'delta': 0}
+    resyncs = 0
+    for _ in range(rounds):
+        results = server.play_round(rng, response_rate)
+        table = packet_size('player_scores', server.full_table())
+        result_list = packet_size('result', server.results_list(results))
+        totals['legacy'] += table * (len(results) + 1) + result_list
+        totals['snapshot'] += table + result_list
+
+        delta = server.delta(results)
+        totals['delta'] += packet_size('state_delta', delta)
+        totals['delta'] += sum(packet_size('round_result', r) for r in results.values()) / players
+        if rng.random() < drop_rate:
+            continue  # Lost delta: the next one reveals the gap
+        if replica.apply_delta(delta) is None:
+            resyncs += 1
+            snapshot = server.snapshot()
+            totals['delta'] += packet_size('state_snapshot', snapshot)
+            replica.apply_snapshot(json.loads(json.dumps(snapshot)))
+
+    if replica.version != server.version:
+        # The final delta was lost; the next one would reveal the gap
+        resyncs += 1
+        replica.apply_snapshot(json.loads(json.dumps(server.snapshot())))
+
+    return {
+        'players': players,
+        'per_round': {scheme: total / rounds for scheme, total in totals.items()},
+        'resyncs': resyncs,
+        'consistent': replica.scores == server.synced,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare bytes per round of full score tables and state deltas.")
+    parser.add_argument("--players", type=int, nargs="+", default=[100, 1000, 10000], help="Player counts")
+    parser.add_argument("--rounds", type=int, default=20, help="Rounds per player count")
+    parser.add_argument("--response-rate", type=float, default=0.8, help="Fraction of players responding per round")
+    parser.add_argument("--drop-rate", type=float, default=0.05, help="Fraction of deltas lost (forces resyncs)")
+    args = parser.parse_args()
+
+    print(f"Bytes received per client per round ({args.response_rate:.0%} of players respond, "
+          f"{args.drop_rate:.0%} of deltas lost)")
+    print(f"{'players':>8}{'legacy':>16}{'snapshot':>14}{'delta':>12}{'delta/snapshot':>16}{'resyncs':>9}{'in sync':>9}")
+    for players in args.players:
+        r = measure(players, args.rounds, args.response_rate, args.drop_rate)
+        per_round = r['per_round']
+        print(f"{players:>8}{per_round['legacy']:>16,.0f}{per_round['snapshot']:>14,.0f}{per_round['delta']:>12,.0f}"
+              f"{per_round['delta'] / per_round['snapshot']:>16.2f}{r['resyncs']:>9}{str(r['consistent']):>9}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# bench_transport.py
+
+import argparse
+import asyncio
+import logging
+import statistics
+import time
+from urllib.parse import urlparse
+
+from game_manager import GameManager
+from network_client import NetworkClient
+
+logger = logging.getLogger(__name__)
+
+# Client transport configurations to compare. Compression only takes effect when
+# the server runs with SOCKET_PER_MESSAGE_DEFLATE=1.
+CONFIGS = {
+    'polling-upgrade': {'transports': ('polling', 'websocket'), 'compression': False},
+    'websocket': {'transports': ('websocket',), 'compression': False},
+    'websocket-deflate': {'transports': ('websocket',), 'compression': True},
+}
+
+
+class ByteCountingProxy:
+    """
+    Local TCP proxy that counts the bytes exchanged with the server.
+
+    Counting at the TCP level includes HTTP requests, websocket framing and
+    Engine.IO heartbeats, i.e. everything the network actually carries.
+    """
+
+    def __init__(self, target_host, target_port):
+        self.target_host = target_host
+        self.target_port = target_port
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self.handle, '127.0.0.1', 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def handle(self, client_reader, client_writer):
+        try:
+            server_reader, server_writer = await asyncio.open_connection(self.target_host, self.target_port)
+        except OSError as e:
+            logger.error(f"ByteCountingProxy: Cannot reach {self.target_host}:{self.target_port}: {e}")
+            client_writer.close()
+            return
+        await asyncio.gather(
+            self.pipe(client_reader, server_writer, sent=True),
+            self.pipe(server_reader, client_writer, sent=False)
+        )
+
+    async def pipe(self, reader, writer, sent):
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    break
+                if sent:
+                    self.bytes_sent += len(data)
+                else:
+                    self.bytes_received += len(data)
+                writer.write(data)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def total(self):
+        return self.bytes_sent + self.bytes_received
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+
+async def run_config(name, options, server_url, trials, messages, payload_players):
+    """
+    Connect repeatedly with one configuration and measure join time, message latency and bytes.
+
+    :return: Dict of results
+    """
+    target = urlparse(server_url)
+    proxy = ByteCountingProxy(target.hostname, target.port or 80)
+    await proxy.start()
+    url = f"http://127.0.0.1:{proxy.port}"
+    game_manager = GameManager('rps', mode='networked')
+    # Scoreboard-shaped padding, the largest message the server broadcasts
+    payload = {'players': [{'player_id': f'player-{i:04d}', 'score': 100.0 * i, 'last_gesture': 'Rock'}
+                           for i in range(payload_players)]}
+
+    connect_times, latencies, join_bytes, message_bytes = [], [], [], []
+    try:
+        for _ in range(trials):
+            client = NetworkClient(url, game_manager, **options)
+            before = proxy.total()
+            start = time.perf_counter()
+            await client.sio.connect(url, transports=client.transports)
+            connect_times.append(time.perf_counter() - start)
+
+            # Joining includes the 'join' event and the initial clock sync started by on_connect
+            deadline = time.perf_counter() + 5
+            while not client.clock_sync.synchronized and time.perf_counter() < deadline:
+                await asyncio.sleep(0.005)
+            join_bytes.append(proxy.total() - before)
+
+            before = proxy.total()
+            for _ in range(messages):
+                sent_at = time.perf_counter()
+                await client.sio.call('time_sync', dict(payload, t0=time.time()), timeout=2)
+                latencies.append(time.perf_counter() - sent_at)
+            message_bytes.append((proxy.total() - before) / messages)
+
+            await client.sio.disconnect()
+    finally:
+        await proxy.close()
+
+    latencies.sort()
+    return {
+        'config': name,
+        'connect_ms': statistics.median(connect_times) * 1000,
+        'join_bytes': statistics.median(join_bytes),
+        'rtt_median_ms': statistics.median(latencies) * 1000,
+        'rtt_p99_ms': latencies[int(len(latencies) * 0.99)] * 1000,
+        'bytes_per_message': statistics.median(message_bytes),
+    }
+
+
+async def run(args):
+    results = []
+    for name in args.configs:
+        results.append(await run_config(name, CONFIGS[name], args.url, args.trials, args.messages, args.payload_players))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare NetworkClient transport configurations against a running server.")
+    parser.add_argument("--url", default="http://localhost:5000", help="Game server URL")
+    parser.add_argument("--configs", nargs="+", choices=list(CONFIGS), default=list(CONFIGS), help="Configurations to run")
+    parser.add_argument("--trials", type=int, default=20, help="Connections per configuration")
+    parser.add_argument("--messages", type=int, default=50, help="Round trips per connection")
+    parser.add_argument("--payload-players", type=int, default=0,
+                        help="Pad each message with a scoreboard of this many players")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='[%(asctime)s] %(levelname)s - %(message)s')
+    results = asyncio.run(run(args))
+
+    print(f"{'config':<20}{'connect ms':>12}{'join bytes':>12}{'rtt ms':>9}{'p99 ms':>9}{'bytes/msg':>11}")
+    for r in results:
+        print(f"{r['config']:<20}{r['connect_ms']:>12.1f}{r['join_bytes']:>12.0f}{r['rtt_median_ms']:>9.2f}"
+              f"{r['rtt_p99_ms']:>9.2f}{r['bytes_per_message']:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
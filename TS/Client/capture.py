@@ -0,0 +1,177 @@
+# capture.py
+
+import logging
+import threading
+import time
+
+import cv2
+
+from frame_buffers import FrameBuffers
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+class CaptureDevice:
+    """
+    Camera capture that negotiates the format with the device and never queues stale frames.
+
+    A background thread calls grab() continuously so the driver buffer never holds
+    more than one frame. A frame is only decoded (retrieve()) when the consumer
+    has asked for one, so frames that will not be processed cost no decode and
+    are counted as dropped.
+    """
+
+    def __init__(self, index=0, width=640, height=480, fps=30, fourcc='MJPG'):
+        """
+        :param index: Camera index for cv2.VideoCapture
+        :param width: Requested frame width
+        :param height: Requested frame height
+        :param fps: Requested frame rate
+        :param fourcc: Requested pixel format (e.g., 'MJPG', 'YUYV'), or None for the driver default
+        """
+        self.index = index
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.cap = None
+
+        self.frame_condition = threading.Condition()
+        self.frame_wanted = False
+        self.frame = None
+        self.frame_seq = 0  # Sequence number of the frame in self.frame
+        self.consumed_seq = 0  # Sequence number of the last frame handed to read()
+        self.frame_time = None  # time.perf_counter() at which self.frame was grabbed
+        self.read_frame_time = None  # Grab time of the frame last returned by read()
+        self.running = False
+        self.grab_thread = None
+
+        # Two decode targets used alternately, so the frame handed out by read()
+        # is never overwritten while the next one is decoded
+        self.retrieve_buffers = [None, None]
+        self.retrieve_index = 0
+        self.frame_buffers = FrameBuffers()  # Resize target, used by the reader thread
+
+        # Delivery statistics
+        self.frames_grabbed = 0
+        self.frames_dropped = 0
+        self.delivered_fps = 0.0
+        self.grabbed_counter = REGISTRY.counter('capture_frames_grabbed', 'Frames delivered by the camera')
+        self.dropped_counter = REGISTRY.counter('capture_frames_dropped', 'Camera frames grabbed but not processed')
+        self.fps_gauge = REGISTRY.gauge('capture_delivered_fps', 'Frame rate actually delivered by the camera')
+
+    def open(self):
+        """
+        Open the device, negotiate resolution, frame rate and pixel format, and start grabbing.
+
+        :return: True if the device opened
+        """
+        self.cap = cv2.VideoCapture(self.index)
+        if not self.cap.isOpened():
+            return False
+
+        if self.fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, self.width)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, self.height)
+        self.cap.set(cv2.CAP_PROP_FPS, self.fps)
+        # Not every backend honours this; continuous grabbing keeps latency low regardless
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        actual_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        actual_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        actual_fps = self.cap.get(cv2.CAP_PROP_FPS)
+        fourcc_code = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        actual_fourcc = ''.join(chr((fourcc_code >> (8 * i)) & 0xFF) for i in range(4)) if fourcc_code else 'n/a'
+        logger.info(f"CaptureDevice: Requested {self.width}x{self.height}@{self.fps} {self.fourcc}, "
+                    f"negotiated {actual_width}x{actual_height}@{actual_fps:.0f} {actual_fourcc}.")
+        if (actual_width, actual_height) != (self.width, self.height):
+            logger.warning("CaptureDevice: Device did not accept the requested resolution; frames will be resized.")
+
+        self.running = True
+        self.grab_thread = threading.Thread(target=self.grab_loop, name='capture-grab', daemon=True)
+        self.grab_thread.start()
+        return True
+
+    def isOpened(self):
+        return self.cap is not None and self.cap.isOpened() and self.running
+
+    def grab_loop(self):
+        window_start = time.perf_counter()
+        window_frames = 0
+        while self.running:
+            if not self.cap.grab():
+                logger.warning("CaptureDevice: Failed to grab frame.")
+                time.sleep(0.01)
+                continue
+            grab_time = time.perf_counter()
+            self.frames_grabbed += 1
+            self.grabbed_counter.inc()
+
+            with self.frame_condition:
+                if self.frame_wanted:
+                    self.retrieve_index ^= 1
+                    success, frame = self.cap.retrieve(self.retrieve_buffers[self.retrieve_index])
+                    if success:
+                        self.retrieve_buffers[self.retrieve_index] = frame
+                        self.frame = frame
+                        self.frame_time = grab_time
+                        self.frame_seq = self.frames_grabbed
+                        self.frame_wanted = False
+                        self.frame_condition.notify_all()
+                else:
+                    # Nobody is waiting: skip the decode and count the frame as dropped
+                    self.frames_dropped += 1
+                    self.dropped_counter.inc()
+
+            window_frames += 1
+            elapsed = time.perf_counter() - window_start
+            if elapsed >= 1.0:
+                self.delivered_fps = window_frames / elapsed
+                self.fps_gauge.set(self.delivered_fps)
+                window_start += elapsed
+                window_frames = 0
+
+    def read(self, timeout=1.0):
+        """
+        Return the next frame grabbed after this call, at the requested resolution.
+
+        :param timeout: Seconds to wait for the camera
+        :return: Tuple of (success, frame) like cv2.VideoCapture.read()
+        """
+        with self.frame_condition:
+            self.frame_wanted = True
+            if not self.frame_condition.wait_for(lambda: self.frame_seq > self.consumed_seq or not self.running,
+                                                 timeout=timeout):
+                return False, None
+            if self.frame_seq <= self.consumed_seq:
+                return False, None
+            self.consumed_seq = self.frame_seq
+            self.read_frame_time = self.frame_time
+            frame = self.frame
+
+        if frame.shape[1] != self.width or frame.shape[0] != self.height:
+            frame = cv2.resize(frame, (self.width, self.height),
+                               dst=self.frame_buffers.get('resize', (self.height, self.width) + frame.shape[2:], frame.dtype))
+        return True, frame
+
+    def stats(self):
+        """
+        :return: Dict with delivered fps and grabbed/dropped frame counts
+        """
+        return {
+            'delivered_fps': self.delivered_fps,
+            'frames_grabbed': self.frames_grabbed,
+            'frames_dropped': self.frames_dropped,
+        }
+
+    def release(self):
+        self.running = False
+        with self.frame_condition:
+            self.frame_condition.notify_all()
+        if self.grab_thread:
+            self.grab_thread.join(timeout=1.0)
+        if self.cap is not None:
+            self.cap.release()
+        logger.info(f"CaptureDevice: Released. Grabbed {self.frames_grabbed} frames, dropped {self.frames_dropped}.")
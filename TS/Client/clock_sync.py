@@ -0,0 +1,56 @@
+# clock_sync.py
+
+import logging
+import time
+from collections import deque
+
+logger = logging.getLogger(__name__)
+
+
+class ClockSync:
+    """
+    NTP-style estimate of the offset between the server clock and the local wall clock.
+
+    Each sample is one request/reply exchange: the client sends at t0, the server
+    stamps its time ts, the reply arrives at t3. Assuming symmetric delay,
+    offset = ts - (t0 + t3) / 2 with an error bound of rtt / 2, so the estimate
+    uses the lowest-RTT sample of a sliding window.
+    """
+
+    def __init__(self, window=16, wall_clock=time.time, monotonic_clock=time.monotonic):
+        self.samples = deque(maxlen=window)  # (rtt, offset)
+        self.wall_clock = wall_clock
+        self.monotonic_clock = monotonic_clock
+        self.offset = 0.0  # server_time - local_wall_time, in seconds
+        self.rtt = None
+
+    @property
+    def synchronized(self):
+        return self.rtt is not None
+
+    def add_sample(self, t0, server_time, t3):
+        """
+        Add one exchange and refresh the estimate.
+
+        :param t0: Local wall time the request was sent (seconds)
+        :param server_time: Server wall time in the reply (seconds)
+        :param t3: Local wall time the reply arrived (seconds)
+        """
+        rtt = t3 - t0
+        if rtt < 0:
+            return
+        self.samples.append((rtt, server_time - (t0 + t3) / 2))
+        self.rtt, self.offset = min(self.samples)
+        logger.debug(f"ClockSync: Sample rtt={rtt * 1000:.1f}ms; offset={self.offset * 1000:.1f}ms (rtt {self.rtt * 1000:.1f}ms)")
+
+    def server_now(self):
+        """
+        Current server time estimate in seconds since the epoch.
+        """
+        return self.wall_clock() + self.offset
+
+    def server_to_local(self, server_time):
+        """
+        Convert a server timestamp (seconds since the epoch) to the local monotonic clock.
+        """
+        return server_time - self.offset - (self.wall_clock() - self.monotonic_clock())
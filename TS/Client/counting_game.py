@@ -4,6 +4,8 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+CORRECT_OUTCOME = 'Correct!'
+
 class CountingGame:
     def __init__(self, game_manager):
         self.game_manager = game_manager
@@ -19,7 +21,7 @@ class CountingGame:
             }
 
         target_number = self.game_manager.prompt
-        correctness = 'Correct!' if user_number == target_number else f'Incorrect! Target was {target_number}'
+        correctness = CORRECT_OUTCOME if user_number == target_number else f'Incorrect! Target was {target_number}'
         base_score = 100 if user_number == target_number else 0
 
         time_weight = 0.3
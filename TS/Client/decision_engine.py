@@ -0,0 +1,215 @@
+# decision_engine.py
+
+import argparse
+import logging
+import math
+import random
+
+logger = logging.getLogger(__name__)
+
+GAME_CLASSES = {
+    'rps': ('Rock', 'Paper', 'Scissors'),
+    'counting': ('0', '1', '2', '3', '4', '5'),
+}
+
+# Per game type tuning:
+#   error_rate:     target probability of committing to the wrong gesture
+#   frame_accuracy: assumed per-frame accuracy of rule-based classifiers
+#   min_frames:     never commit on fewer informative frames than this
+#   decay:          per-frame forgetting factor so evidence from an old pose fades
+#   min_latency:    seconds after the prompt before a frame can show a reaction to it
+DECISION_BOUNDS = {
+    'rps': {'error_rate': 0.02, 'frame_accuracy': 0.8, 'min_frames': 2, 'decay': 0.9, 'min_latency': 0.2},
+    'counting': {'error_rate': 0.03, 'frame_accuracy': 0.7, 'min_frames': 3, 'decay': 0.9, 'min_latency': 0.3},
+}
+
+
+class SequentialDecision:
+    """
+    Commit to a gesture as soon as accumulated per-frame evidence meets an error bound.
+
+    This is a multi-hypothesis sequential probability ratio test: every class
+    keeps a log-likelihood that each frame updates, and the test stops when the
+    log-likelihood ratio of the leading class against all alternatives reaches
+    log((1 - error_rate) / error_rate), which under a uniform prior is the point
+    where its posterior reaches 1 - error_rate. Frames with no hand or an unknown pose carry
+    no evidence and only decay what has been gathered.
+
+    The error bound assumes independent frames. Webcam frames are not: a
+    misclassified pose tends to stay misclassified for several frames, so
+    min_frames and decay are what keep a short run of them from committing.
+
+    A hand that is already up when the prompt starts is not an answer:
+      - nothing is committed in the first min_latency seconds (or on the
+        first frame), and the leading pose at the end of that window is held;
+      - the held pose is never committed. Its frames still count as
+        evidence, which keeps noise frames from winning, until release_frames
+        frames in a row show no hand or an unknown pose. Then the evidence
+        is cleared and the held pose is released. A player who already
+        shows the right answer has to lower the hand once.
+    """
+
+    def __init__(self, classes, error_rate=0.02, frame_accuracy=0.8, min_frames=2, decay=0.9,
+                 min_latency=0.2, release_frames=2):
+        self.classes = tuple(classes)
+        self.error_rate = error_rate
+        self.frame_accuracy = frame_accuracy
+        self.min_frames = min_frames
+        self.decay = decay
+        self.min_latency = min_latency
+        self.release_frames = release_frames
+        self.threshold = math.log((1 - error_rate) / error_rate)
+        self.reset()
+
+    @classmethod
+    def for_game_type(cls, game_type, **overrides):
+        """
+        Build an engine with the DECISION_BOUNDS tuning for a game type.
+        """
+        bounds = dict(DECISION_BOUNDS[game_type], **overrides)
+        return cls(GAME_CLASSES[game_type], **bounds)
+
+    def reset(self):
+        self.log_likelihood = {c: 0.0 for c in self.classes}
+        self.frames = 0
+        self.decision = None
+        self.started = False
+        self.held = None  # Pose shown at prompt onset; not committed until the hand goes down
+        self.unknown_frames = 0  # Consecutive frames with no hand or an unknown pose
+
+    def update(self, gesture, elapsed, probability=None):
+        """
+        Add one frame of evidence.
+
+        :param gesture: Per-frame gesture label
+        :param elapsed: Seconds from the prompt start to the frame
+        :param probability: Classifier probability for the label, if calibrated; otherwise
+            the configured frame_accuracy is used
+        :return: (gesture, confidence) on the frame the engine commits, else None
+        """
+        if self.decision is not None:
+            return None
+
+        for c in self.log_likelihood:
+            self.log_likelihood[c] *= self.decay
+
+        onset = not self.started or elapsed < self.min_latency
+        self.started = True
+        if gesture in self.log_likelihood:
+            self.unknown_frames = 0
+        else:
+            self.unknown_frames += 1
+            if self.held is not None and self.unknown_frames >= self.release_frames:
+                # The hand went down; what it shows next is a new pose
+                logger.debug(f"SequentialDecision: Held pose '{self.held}' released.")
+                self.held = None
+                self.log_likelihood = {c: 0.0 for c in self.classes}
+                self.frames = 0
+            return None
+
+        p = self.frame_accuracy if probability is None else probability
+        p = min(max(p, 1e-3), 1 - 1e-3)
+        hit = math.log(p)
+        miss = math.log((1 - p) / (len(self.classes) - 1))
+        for c in self.log_likelihood:
+            self.log_likelihood[c] += hit if c == gesture else miss
+        self.frames += 1
+
+        leader, llr = self.leader_llr()
+        if onset:
+            # Too early to be a reaction: this is the pose the hand was already showing
+            self.held = leader
+        if (self.frames >= self.min_frames and llr >= self.threshold and elapsed >= self.min_latency
+                and leader != self.held):
+            confidence = 1.0 / (1.0 + math.exp(-llr))
+            self.decision = (leader, confidence)
+            logger.debug(f"SequentialDecision: Committed '{leader}' after {self.frames} frames (p={confidence:.3f}).")
+            return self.decision
+        return None
+
+    def leader_llr(self):
+        """
+        Leading class and its log-likelihood ratio against the union of all other classes.
+        """
+        leader = max(self.log_likelihood, key=self.log_likelihood.get)
+        others = [v for c, v in self.log_likelihood.items() if c != leader]
+        top = max(others)
+        rest = top + math.log(sum(math.exp(v - top) for v in others))
+        return leader, self.log_likelihood[leader] - rest
+
+
+def simulate(game_type, frame_accuracy, trials=2000, fps=30, seed=0, reaction_time=0.4, correlation=0.0,
+             **overrides):
+    """
+    Monte Carlo estimate of time-to-commit and false-commit rate for noisy frame streams.
+
+    Each trial starts with the hand still showing a random pose from the
+    previous round. After reaction_time the hand is out of view for 0.1 s and
+    then shows the true gesture. Every frame the classifier reports the pose
+    with probability frame_accuracy, otherwise a random other class; with
+    probability correlation a frame repeats the previous frame's label
+    instead, which models how webcam errors persist across frames.
+
+    :return: Dict with median and p90 seconds to commit and the false-commit rate
+    """
+    rng = random.Random(seed)
+    engine = SequentialDecision.for_game_type(game_type, **overrides)
+    classes = engine.classes
+    times, errors = [], 0
+    for _ in range(trials):
+        engine.reset()
+        truth = rng.choice(classes)
+        previous = rng.choice(classes)
+        observed = None
+        for frame in range(fps * 10):
+            elapsed = frame / fps
+            if elapsed < reaction_time:
+                shown = previous
+            elif elapsed < reaction_time + 0.1:
+                shown = 'None'
+            else:
+                shown = truth
+            if observed is not None and rng.random() < correlation:
+                pass  # The previous label persists
+            elif shown == 'None' or rng.random() < frame_accuracy:
+                observed = shown
+            else:
+                observed = rng.choice([c for c in classes if c != shown])
+            decision = engine.update(observed, elapsed)
+            if decision:
+                times.append(elapsed)
+                errors += decision[0] != truth
+                break
+    times.sort()
+    return {
+        'median': times[len(times) // 2],
+        'p90': times[int(len(times) * 0.9)],
+        'false_rate': errors / max(len(times), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Estimate decision latency and false-commit rate.")
+    parser.add_argument("game_type", choices=sorted(GAME_CLASSES), help="Type of the game")
+    parser.add_argument("--frame-accuracy", type=float, default=0.8, help="True per-frame classifier accuracy")
+    parser.add_argument("--error-rate", type=float, help="Override the target false-commit rate")
+    parser.add_argument("--fps", type=int, default=30, help="Camera frame rate")
+    parser.add_argument("--trials", type=int, default=2000, help="Number of simulated responses")
+    parser.add_argument("--reaction-time", type=float, default=0.4,
+                        help="Seconds the previous round's pose stays up after the prompt")
+    parser.add_argument("--correlation", type=float, default=0.0,
+                        help="Probability that a frame repeats the previous frame's label")
+    parser.add_argument("--min-latency", type=float, help="Override the reaction-time floor (s)")
+    args = parser.parse_args()
+
+    overrides = {'error_rate': args.error_rate} if args.error_rate else {}
+    if args.min_latency is not None:
+        overrides['min_latency'] = args.min_latency
+    result = simulate(args.game_type, args.frame_accuracy, args.trials, args.fps,
+                      reaction_time=args.reaction_time, correlation=args.correlation, **overrides)
+    print(f"Median time to commit: {result['median'] * 1000:.0f}ms  p90: {result['p90'] * 1000:.0f}ms")
+    print(f"False commit rate: {result['false_rate']:.4f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+# evaluate.py
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+from collections import Counter, defaultdict
+
+import cv2
+
+from decision_engine import SequentialDecision
+from frame_buffers import FrameBuffers, mirror_frame
+from landmark_filter import OneEuroFilter
+
+logger = logging.getLogger(__name__)
+
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mov', '.mkv', '.webm')
+RECORDING_EXTENSIONS = ('.lmrec',)
+
+# Gestures that never count as a clip-level answer
+NON_ANSWERS = ('None', 'Unknown')
+
+
+def discover_clips(corpus, modes=None):
+    """
+    Find labeled clips laid out as <corpus>/<mode>/<label>/<clip>.
+
+    Clips are videos or landmark recordings (.lmrec); recordings skip MediaPipe
+    and evaluate only the classifier, vote, debounce and decision logic. The
+    start of a clip is taken as the prompt onset, as in a recorded response.
+
+    :param corpus: Corpus root directory
+    :param modes: Game modes to include (defaults to all found)
+    :return: Sorted list of (path, mode, label)
+    """
+    clips = []
+    for mode in sorted(os.listdir(corpus)):
+        mode_dir = os.path.join(corpus, mode)
+        if not os.path.isdir(mode_dir) or (modes and mode not in modes):
+            continue
+        for label in sorted(os.listdir(mode_dir)):
+            label_dir = os.path.join(mode_dir, label)
+            if not os.path.isdir(label_dir):
+                continue
+            for name in sorted(os.listdir(label_dir)):
+                if name.lower().endswith(VIDEO_EXTENSIONS + RECORDING_EXTENSIONS):
+                    clips.append((os.path.join(label_dir, name), mode, label))
+    return clips
+
+
+def video_frames(path):
+    """
+    Yield (timestamp, frame) for a video file, timestamps in clip time.
+    """
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30
+    index = 0
+    try:
+        while True:
+            success, frame = cap.read()
+            if not success:
+                break
+            yield index / fps, frame
+            index += 1
+    finally:
+        cap.release()
+
+
+def evaluate_clip(task):
+    """
+    Run a fresh GestureDetector over one clip (executed in a worker process).
+
+    :param task: Tuple of (path, mode, label, options)
+    :return: Dict with per-frame predictions, time to the first correct debounced
+        gesture, the SequentialDecision answer and its time, and the CPU time spent
+    """
+    from gesture_detection import GestureDetector
+
+    path, mode, label, options = task
+    detector = GestureDetector(max_buffer_len=options['vote_frames'], mode=mode, num_threads=options['threads'])
+    detector.debounce_time = options['debounce']
+    detector.landmark_filter = OneEuroFilter(**options['landmark_filter']) if options['landmark_filter'] else None
+    if options['classifier_model']:
+        detector.load_classifier_model(options['classifier_model'])
+    # Clip time starts at 0; do not let the initial debounce hold back the first commit
+    detector.last_gesture_time = float('-inf')
+    # The live client submits what this engine commits to, with the prompt at clip start
+    decision = SequentialDecision.for_game_type(mode, **options['decision'])
+    commit = None
+
+    def decide(elapsed):
+        nonlocal commit
+        if commit is None:
+            gesture, probability = detector.get_frame_gesture()
+            result = decision.update(gesture, elapsed, probability)
+            if result:
+                commit = (result[0], elapsed)
+
+    predictions = []
+    time_to_stable = None
+    cpu_start = time.process_time()
+    try:
+        if path.lower().endswith(RECORDING_EXTENSIONS):
+            from landmark_recording import LandmarkReplay
+            replay = LandmarkReplay(path)
+            start = None
+            for timestamp, hands, _, _ in replay.frames():
+                start = timestamp if start is None else start
+                predictions.append(detector.process_landmarks(hands, timestamp))
+                decide(timestamp - start)
+                if time_to_stable is None and detector.current_gesture == label:
+                    time_to_stable = timestamp - start
+        else:
+            frame_buffers = FrameBuffers()
+            for timestamp, frame in video_frames(path):
+                # Same input as the live loop, which mirrors the camera image before detection
+                if options['mirror']:
+                    frame = mirror_frame(frame, frame_buffers)
+                detector.process_frame(frame, timestamp=timestamp)
+                predictions.append(detector.frame_gesture)
+                if detector.frame_processed:
+                    decide(timestamp)
+                if time_to_stable is None and detector.current_gesture == label:
+                    time_to_stable = timestamp
+    finally:
+        detector.release()
+
+    answers = Counter(p for p in predictions if p not in NON_ANSWERS)
+    return {
+        'path': path,
+        'mode': mode,
+        'label': label,
+        'predictions': predictions,
+        'clip_prediction': answers.most_common(1)[0][0] if answers else 'None',
+        'time_to_stable': time_to_stable,
+        'committed': commit[0] if commit else None,
+        'time_to_commit': commit[1] if commit else None,
+        'cpu_seconds': time.process_time() - cpu_start,
+    }
+
+
+def init_worker():
+    # Per-frame gesture changes would flood the console from every worker
+    logging.getLogger('gesture_detection').setLevel(logging.WARNING)
+
+
+def build_report(results, wall_seconds, workers):
+    """
+    Aggregate per-clip results into the evaluation report.
+    """
+    confusion = defaultdict(Counter)  # "mode/label" -> predicted gesture -> frames
+    clips = defaultdict(lambda: [0, 0, 0])  # "mode/label" -> [clips, correct clips, correct commits]
+    stable_times = defaultdict(list)
+    commit_times = defaultdict(list)  # Times of correct commits only
+    frames = 0
+    cpu_seconds = 0.0
+    for r in results:
+        key = f"{r['mode']}/{r['label']}"
+        confusion[key].update(r['predictions'])
+        clips[key][0] += 1
+        clips[key][1] += r['clip_prediction'] == r['label']
+        if r['time_to_stable'] is not None:
+            stable_times[key].append(r['time_to_stable'])
+        if r['committed'] == r['label']:
+            clips[key][2] += 1
+            commit_times[key].append(r['time_to_commit'])
+        frames += len(r['predictions'])
+        cpu_seconds += r['cpu_seconds']
+
+    classes = {}
+    for key in sorted(confusion):
+        label = key.split('/', 1)[1]
+        class_frames = sum(confusion[key].values())
+        times = stable_times[key]
+        commits = commit_times[key]
+        classes[key] = {
+            'frames': class_frames,
+            'frame_accuracy': confusion[key][label] / class_frames if class_frames else 0.0,
+            'clips': clips[key][0],
+            'clip_accuracy': clips[key][1] / clips[key][0],
+            'stabilized': len(times) / clips[key][0],
+            'median_time_to_stable': statistics.median(times) if times else None,
+            'commit_accuracy': clips[key][2] / clips[key][0],
+            'median_time_to_commit': statistics.median(commits) if commits else None,
+        }
+
+    all_times = [t for times in stable_times.values() for t in times]
+    all_commit_times = [t for times in commit_times.values() for t in times]
+    total_clips = sum(c[0] for c in clips.values())
+    return {
+        'clips': total_clips,
+        'frames': frames,
+        'frame_accuracy': sum(confusion[k][k.split('/', 1)[1]] for k in confusion) / max(frames, 1),
+        'clip_accuracy': sum(c[1] for c in clips.values()) / max(total_clips, 1),
+        'median_time_to_stable': statistics.median(all_times) if all_times else None,
+        'commit_accuracy': sum(c[2] for c in clips.values()) / max(total_clips, 1),
+        'median_time_to_commit': statistics.median(all_commit_times) if all_commit_times else None,
+        'fps_per_core': frames / max(cpu_seconds, 1e-9),
+        'wall_seconds': wall_seconds,
+        'workers': workers,
+        'classes': classes,
+        'confusion': {key: dict(counts) for key, counts in sorted(confusion.items())},
+    }
+
+
+def compare_to_baseline(report, baseline, accuracy_tolerance=0.01, latency_tolerance=0.1, fps_tolerance=0.2):
+    """
+    List regressions of a report against a baseline report.
+
+    :param accuracy_tolerance: Allowed absolute drop in frame, clip or commit accuracy
+    :param latency_tolerance: Allowed increase in median time to stable gesture or to commit (seconds)
+    :param fps_tolerance: Allowed relative drop in frames per second per core
+    :return: List of human-readable regression descriptions (empty if none)
+    """
+    regressions = []
+
+    def check_accuracy(name, new, old):
+        # Baselines written before commit metrics existed have no value to compare with
+        if old is not None and new < old - accuracy_tolerance:
+            regressions.append(f"{name}: {old:.3f} -> {new:.3f}")
+
+    def check_latency(name, new, old):
+        if old is not None and (new is None or new > old + latency_tolerance):
+            regressions.append(f"{name}: {old:.3f}s -> {'never' if new is None else f'{new:.3f}s'}")
+
+    check_accuracy('frame_accuracy', report['frame_accuracy'], baseline['frame_accuracy'])
+    check_accuracy('clip_accuracy', report['clip_accuracy'], baseline['clip_accuracy'])
+    check_latency('median_time_to_stable', report['median_time_to_stable'], baseline['median_time_to_stable'])
+    check_accuracy('commit_accuracy', report['commit_accuracy'], baseline.get('commit_accuracy'))
+    check_latency('median_time_to_commit', report['median_time_to_commit'], baseline.get('median_time_to_commit'))
+    for key, old in baseline['classes'].items():
+        new = report['classes'].get(key)
+        if new is None:
+            regressions.append(f"{key}: missing from this run")
+            continue
+        check_accuracy(f"{key} frame_accuracy", new['frame_accuracy'], old['frame_accuracy'])
+        check_accuracy(f"{key} clip_accuracy", new['clip_accuracy'], old['clip_accuracy'])
+        check_latency(f"{key} median_time_to_stable", new['median_time_to_stable'], old['median_time_to_stable'])
+        check_accuracy(f"{key} commit_accuracy", new['commit_accuracy'], old.get('commit_accuracy'))
+        check_latency(f"{key} median_time_to_commit", new['median_time_to_commit'], old.get('median_time_to_commit'))
+    if report['fps_per_core'] < baseline['fps_per_core'] * (1 - fps_tolerance):
+        regressions.append(f"fps_per_core: {baseline['fps_per_core']:.1f} -> {report['fps_per_core']:.1f}")
+    return regressions
+
+
+def print_report(report):
+    def seconds(value):
+        return f"{value:.2f}s" if value is not None else "n/a"
+
+    print(f"Clips: {report['clips']}  Frames: {report['frames']}  Workers: {report['workers']}  "
+          f"Wall: {report['wall_seconds']:.1f}s  FPS/core: {report['fps_per_core']:.1f}")
+    print(f"Frame accuracy: {report['frame_accuracy']:.1%}  Clip accuracy: {report['clip_accuracy']:.1%}  "
+          f"Median time to stable: {seconds(report['median_time_to_stable'])}")
+    print(f"Commit accuracy: {report['commit_accuracy']:.1%}  "
+          f"Median time to commit: {seconds(report['median_time_to_commit'])}")
+    print(f"\n{'class':<20}{'frames':>8}{'frame acc':>11}{'clips':>7}{'clip acc':>10}{'stable':>8}{'t stable':>10}"
+          f"{'commit acc':>12}{'t commit':>10}")
+    for key, c in report['classes'].items():
+        print(f"{key:<20}{c['frames']:>8}{c['frame_accuracy']:>11.1%}{c['clips']:>7}{c['clip_accuracy']:>10.1%}"
+              f"{c['stabilized']:>8.0%}{seconds(c['median_time_to_stable']):>10}"
+              f"{c['commit_accuracy']:>12.1%}{seconds(c['median_time_to_commit']):>10}")
+
+    predicted = sorted({p for counts in report['confusion'].values() for p in counts})
+    print("\nConfusion matrix (frames, rows = truth):")
+    print(f"{'':<20}" + "".join(f"{p:>9}" for p in predicted))
+    for key, counts in report['confusion'].items():
+        print(f"{key:<20}" + "".join(f"{counts.get(p, 0):>9}" for p in predicted))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate GestureDetector over a labeled clip corpus.")
+    parser.add_argument("corpus", help="Directory laid out as <mode>/<label>/<clip>")
+    parser.add_argument("--mode", action="append", choices=["rps", "counting"], help="Restrict to a game mode")
+    parser.add_argument("--classifier-model", help="Learned landmark classifier (.npz)")
+    parser.add_argument("--vote-frames", type=int, default=5, help="Number of frames in the gesture vote window")
+    parser.add_argument("--debounce", type=float, default=1.0, help="Debounce time in seconds")
+    parser.add_argument("--decision-error-rate", type=float,
+                        help="Target false-submission rate (overrides the game type default)")
+    parser.add_argument("--no-landmark-filter", action="store_true", help="Classify raw, unsmoothed landmarks")
+    parser.add_argument("--filter-min-cutoff", type=float, default=1.0, help="Landmark filter cutoff (Hz) for a still hand")
+    parser.add_argument("--filter-beta", type=float, default=10.0, help="Landmark filter responsiveness to motion")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--no-mirror", action="store_true",
+                        help="Video clips are already mirrored; do not flip them like the live camera feed")
+    parser.add_argument("--worker-threads", type=int,
+                        help="Cap OpenCV threads per worker (default: library defaults)")
+    parser.add_argument("--report", help="Write the JSON report to this file")
+    parser.add_argument("--baseline", help="Baseline JSON report to compare against; exits 1 on regression")
+    parser.add_argument("--accuracy-tolerance", type=float, default=0.01, help="Allowed absolute accuracy drop")
+    parser.add_argument("--latency-tolerance", type=float, default=0.1,
+                        help="Allowed time-to-stable or time-to-commit increase (s)")
+    parser.add_argument("--fps-tolerance", type=float, default=0.2, help="Allowed relative FPS/core drop")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='[%(asctime)s] %(levelname)s - %(message)s')
+
+    clips = discover_clips(args.corpus, args.mode)
+    if not clips:
+        logger.error(f"Evaluate: No clips found under {args.corpus}.")
+        sys.exit(2)
+
+    options = {
+        'vote_frames': args.vote_frames,
+        'debounce': args.debounce,
+        'classifier_model': args.classifier_model,
+        'threads': args.worker_threads,
+        'mirror': not args.no_mirror,
+        'decision': {'error_rate': args.decision_error_rate} if args.decision_error_rate else {},
+        'landmark_filter': None if args.no_landmark_filter else {'min_cutoff': args.filter_min_cutoff,
+                                                                  'beta': args.filter_beta},
+    }
+    tasks = [(path, mode, label, options) for path, mode, label in clips]
+    workers = max(1, min(args.workers or 1, len(tasks)))
+    start = time.perf_counter()
+    with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+        results = list(pool.imap_unordered(evaluate_clip, tasks))
+    report = build_report(results, time.perf_counter() - start, workers)
+
+    print_report(report)
+    if args.report:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(report, baseline, args.accuracy_tolerance,
+                                          args.latency_tolerance, args.fps_tolerance)
+        if regressions:
+            print("\nRegressions against baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            sys.exit(1)
+        print("\nNo regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+# frame_buffers.py
+
+import cv2
+import numpy as np
+
+
+class FrameBuffers:
+    """
+    Named, preallocated frame buffers reused across frames.
+
+    A buffer is only reallocated when the requested shape or dtype changes
+    (e.g. after a resolution change), so the steady-state frame path performs
+    no full-frame allocations.
+    """
+
+    def __init__(self):
+        self.buffers = {}
+        self.allocations = 0  # Number of (re)allocations, for benchmarking
+
+    def get(self, name, shape, dtype=np.uint8):
+        """
+        :param name: Buffer name, unique per use site
+        :param shape: Required array shape
+        :param dtype: Required dtype
+        :return: A reusable array of the given shape and dtype
+        """
+        buffer = self.buffers.get(name)
+        if buffer is None or buffer.shape != shape or buffer.dtype != dtype:
+            buffer = np.empty(shape, dtype=dtype)
+            self.buffers[name] = buffer
+            self.allocations += 1
+        return buffer
+
+
+def mirror_frame(frame, buffers):
+    """
+    Horizontally flip a camera frame into a reused buffer.
+    """
+    return cv2.flip(frame, 1, dst=buffers.get('mirror', frame.shape, frame.dtype))
+
+
+def preprocess_for_inference(image, buffers, scale=1.0, blur=True):
+    """
+    Convert a BGR frame to blurred RGB for MediaPipe, writing into reused buffers.
+
+    :param image: BGR frame
+    :param buffers: FrameBuffers owned by the caller's thread
+    :param scale: Inference resolution relative to the frame (landmarks are normalized, so
+        they do not need rescaling)
+    :param blur: Apply the Gaussian blur
+    :return: RGB frame (a view of a reused buffer, valid until the next call)
+    """
+    if scale != 1.0:
+        height, width = image.shape[:2]
+        size = (max(1, int(width * scale)), max(1, int(height * scale)))
+        image = cv2.resize(image, size, dst=buffers.get('inference', (size[1], size[0]) + image.shape[2:], image.dtype),
+                           interpolation=cv2.INTER_AREA)
+    rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=buffers.get('rgb', image.shape, image.dtype))
+    if not blur:
+        return rgb
+    return cv2.GaussianBlur(rgb, (5, 5), 0, dst=buffers.get('blur', image.shape, image.dtype))
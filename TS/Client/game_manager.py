@@ -3,22 +3,42 @@
 import asyncio
 import random
 import logging
+import time
 
-from rock_paper_scissors import RockPaperScissorsGame
-from counting_game import CountingGame
+from rock_paper_scissors import RockPaperScissorsGame, WIN_OUTCOME, winning_gesture
+from counting_game import CountingGame, CORRECT_OUTCOME
+from metrics import REGISTRY
 
 logger = logging.getLogger(__name__)
 
+# Result texts that count as a correct answer
+CORRECT_OUTCOMES = (WIN_OUTCOME, CORRECT_OUTCOME)
+
+
+def correct_gesture(game_type, prompt):
+    """
+    The answer scored as correct: the gesture beating the prompt in RPS, the prompted count otherwise.
+    """
+    if game_type == 'rps':
+        return winning_gesture(prompt)
+    return str(prompt)
+
 class GameManager:
-    def __init__(self, game_type, network_client=None, mode='networked'):
+    def __init__(self, game_type, network_client=None, mode='networked', clock=None, rng=None, metric_labels=None):
         """
         Initialize the GameManager.
 
         :param game_type: 'rps' or 'counting'
         :param network_client: Instance of NetworkClient for networked mode
         :param mode: 'networked', 'local', or 'self-play'
+        :param clock: Callable returning the current time in seconds (defaults to time.monotonic)
+        :param rng: random.Random instance for local prompts (defaults to the global random module)
+        :param metric_labels: Labels for this instance's gauges, needed when one process hosts
+            several GameManagers (e.g. {'room': room_id})
         """
         self.game_type = game_type  # 'rps' or 'counting'
+        self.clock = clock or time.monotonic
+        self.rng = rng or random
         self.network_client = network_client
         self.mode = mode  # 'networked', 'local', 'self-play'
         self.is_networked = self.mode == 'networked'  # Depend solely on mode
@@ -28,13 +48,22 @@ class GameManager:
         self.current_round = 0
         self.total_rounds = 5  # Default number of rounds
         self.score = 0
-        self.game_state = 'waiting'  # 'waiting', 'prompted', 'responded'
+        self.game_state = 'waiting'  # 'waiting', 'armed', 'prompted', 'responded'
+        self.prompt_time = None  # clock() time at which the current prompt became active
+        self.next_prompt_time = None  # clock() time of an announced prompt that has not started yet
+        self.response_sent = False
 
         # Define response_timeout based on game type
         if game_type == 'rps':
             self.response_timeout = 3  # seconds
         elif game_type == 'counting':
             self.response_timeout = 5  # seconds
+        # How long the round stays open; the server's responseTimeout when it sends one.
+        # Local scoring always uses response_timeout.
+        self.round_timeout = self.response_timeout
+
+        # How long to wait for the server's next prompt before logging a warning
+        self.prompt_wait_timeout = 15  # seconds
 
         # Initialize player_id
         self.player_id = 'LocalPlayer'  # Default for non-networked mode
@@ -56,6 +85,39 @@ class GameManager:
         # UI Queue for communication
         self.ui_queue = None  # To be set via set_ui_queue
 
+        # GestureDetector whose classifier follows the game type
+        self.gesture_detector = None  # To be set by the App
+
+        # SessionRecorder for prompts, responses and timeouts (optional)
+        self.session_recorder = None
+
+        # IdleScheduler pacing the webcam loop, woken when a prompt is armed or starts (optional)
+        self.idle_scheduler = None
+
+        # Server score table (StateSync), kept current by the NetworkClient in networked mode
+        self.synced_state = None
+        self.synced_result_round = None  # Round of the last server result shown in the UI
+
+        # Metrics
+        self.rounds_counter = REGISTRY.counter('game_rounds', 'Game rounds started')
+        self.prompt_timeouts_counter = REGISTRY.counter('game_prompt_timeouts', 'Rounds with no prompt from the server')
+        self.response_timeouts_counter = REGISTRY.counter('game_response_timeouts', 'Rounds with no response before the timeout')
+        self.responses_accepted_counter = REGISTRY.counter('game_responses_accepted', 'Responses accepted for scoring')
+        self.responses_rejected_counter = REGISTRY.counter('game_responses_rejected', 'Responses rejected with no active prompt')
+        self.response_time_histogram = REGISTRY.histogram('game_response_time_seconds', 'Reported player response time')
+        self.metric_labels = metric_labels or {}
+        self.queue_depth_gauge = REGISTRY.gauge('game_prompt_queue_depth', 'Prompts waiting in prompt_queue')
+        self.queue_depth_gauge.set_function(self.prompt_queue.qsize, **self.metric_labels)
+        self.score_gauge = REGISTRY.gauge('game_score', 'Current total score')
+        self.score_gauge.set_function(lambda: self.score, **self.metric_labels)
+
+    def release_metrics(self):
+        """
+        Stop reporting this instance's gauges, e.g. when its room closes.
+        """
+        for gauge in (self.queue_depth_gauge, self.score_gauge):
+            gauge.remove_function(**self.metric_labels)
+
     def set_ui_queue(self, ui_queue):
         """
         Set the UI queue for sending messages to the UI.
@@ -125,34 +187,42 @@ class GameManager:
         """
         try:
             while self.current_round < self.total_rounds:
-                self.current_round += 1
-                logger.info(f"GameManager: --- Round {self.current_round} of {self.total_rounds} ---")
-
                 if self.is_networked:
-                    # Wait for a prompt from the server
+                    # Wait for a prompt from the server. Rounds are driven by the server,
+                    # so a late prompt does not burn a round.
                     try:
-                        event_type, data = await asyncio.wait_for(self.prompt_queue.get(), timeout=self.response_timeout)
-                        if event_type == 'prompt':
-                            self.prompt = data.get('prompt')
-                            self.game_state = 'prompted'
-                            await self.handle_prompt()
+                        event_type, data = await asyncio.wait_for(self.prompt_queue.get(), timeout=self.prompt_wait_timeout)
                     except asyncio.TimeoutError:
-                        logger.warning("GameManager: No prompt received within the timeout.")
+                        logger.warning("GameManager: No prompt received within the timeout, still waiting.")
+                        self.prompt_timeouts_counter.inc()
+                        continue
+                    if event_type != 'prompt':
                         continue
+                    self.current_round = data.get('currentRound', self.current_round + 1)
+                    self.rounds_counter.inc()
+                    logger.info(f"GameManager: --- Round {self.current_round} of {self.total_rounds} ---")
+                    await self.activate_prompt(data)
                 else:
+                    self.current_round += 1
+                    self.rounds_counter.inc()
+                    logger.info(f"GameManager: --- Round {self.current_round} of {self.total_rounds} ---")
                     # Generate local prompt
                     await self.get_prompt_local()
 
-                # Wait for response or timeout
+                # Wait for response or timeout, measured from the (synchronized) prompt start
                 try:
-                    await asyncio.wait_for(self.round_event.wait(), timeout=self.response_timeout)
+                    remaining = max(0, self.prompt_time + self.round_timeout - self.clock())
+                    await asyncio.wait_for(self.round_event.wait(), timeout=remaining)
                 except asyncio.TimeoutError:
                     logger.warning("GameManager: No response received within the timeout.")
+                    self.response_timeouts_counter.inc()
                     self.round_score = 0
                     self.result_text = 'No response received.'
                     self.send_ui_message("result", self.result_text)
                     self.send_ui_message("score", f"Score: {self.score:.1f}")
                     self.game_state = 'waiting'  # Reset state after timeout
+                    if self.session_recorder:
+                        self.session_recorder.record_timeout(self.current_round, self.player_id, self.prompt, self.score)
 
                 self.round_event.clear()
 
@@ -166,6 +236,55 @@ class GameManager:
             logger.info("GameManager: Game loop has been cancelled.")
             pass
 
+    async def activate_prompt(self, data):
+        """
+        Activate a prompt received from the server.
+
+        If the prompt carries a server-side 'goAt' timestamp and the clock is
+        synchronized, the round is armed until that instant so that delivery
+        jitter does not count against the player's response time.
+
+        :param data: Prompt payload from the server
+        """
+        self.prompt = data.get('prompt')
+        self.response_sent = False
+        # The server's window only bounds the wait; it does not change local scoring
+        if data.get('responseTimeout'):
+            self.round_timeout = data['responseTimeout'] / 1000
+        else:
+            self.round_timeout = self.response_timeout
+
+        go_time = self.clock()
+        clock_sync = self.network_client.clock_sync if self.network_client else None
+        if data.get('goAt') and clock_sync and clock_sync.synchronized:
+            go_time = clock_sync.server_to_local(data['goAt'] / 1000)
+            self.game_state = 'armed'
+            self.next_prompt_time = go_time
+            if self.idle_scheduler:
+                self.idle_scheduler.wake()
+            logger.info(f"GameManager: Prompt '{self.prompt}' armed, starting in {go_time - self.clock():.3f}s.")
+            await asyncio.sleep(max(0, go_time - self.clock()))
+
+        # Start the round with an empty vote so earlier frames cannot leak into the answer
+        if self.gesture_detector:
+            self.gesture_detector.arm()
+        self.next_prompt_time = None
+        self.prompt_time = go_time
+        self.game_state = 'prompted'
+        if self.idle_scheduler:
+            self.idle_scheduler.wake()
+        if self.session_recorder:
+            self.session_recorder.record_prompt(self.current_round, self.prompt, self.player_id)
+        await self.handle_prompt()
+
+    def time_since_prompt(self):
+        """
+        Seconds since the current prompt started, on the GameManager clock.
+        """
+        if self.prompt_time is None:
+            return 0
+        return max(0, self.clock() - self.prompt_time)
+
     async def handle_prompt(self):
         """Handle prompt received from the server or generated locally."""
         logger.info(f"GameManager: Handling prompt '{self.prompt}'.")
@@ -175,11 +294,17 @@ class GameManager:
     async def get_prompt_local(self):
         """Generate a new prompt locally."""
         if self.game_type == 'rps':
-            self.prompt = random.choice(['Rock', 'Paper', 'Scissors'])
+            self.prompt = self.rng.choice(['Rock', 'Paper', 'Scissors'])
         elif self.game_type == 'counting':
-            self.prompt = random.randint(1, 5)
+            self.prompt = self.rng.randint(1, 5)
         logger.info(f"GameManager: Generated local prompt: {self.prompt}")
+        self.response_sent = False
         self.game_state = 'prompted'
+        self.prompt_time = self.clock()
+        if self.idle_scheduler:
+            self.idle_scheduler.wake()
+        if self.session_recorder:
+            self.session_recorder.record_prompt(self.current_round, self.prompt, self.player_id)
         self.send_ui_message("prompt", f"Round {self.current_round}: {self.prompt}")
 
     async def receive_prompt(self, prompt_data):
@@ -189,6 +314,9 @@ class GameManager:
         :param prompt_data: Data containing the prompt
         """
         if self.is_networked:
+            if self.game_loop_task is None or self.game_loop_task.done():
+                # The server drives the game: follow its round count
+                await self.start_game(prompt_data.get('totalRounds', self.total_rounds))
             await self.prompt_queue.put(('prompt', prompt_data))
             logger.debug(f"GameManager: Prompt received and enqueued: {prompt_data}")
         else:
@@ -206,6 +334,7 @@ class GameManager:
         """
         if self.game_state != 'prompted':
             logger.warning("GameManager: No active prompt to receive responses.")
+            self.responses_rejected_counter.inc()
             return False  # Response not accepted
 
         # Handle response based on game logic
@@ -218,7 +347,13 @@ class GameManager:
         self.score += self.round_score
         self.result_text = result['result_text']
         self.game_state = 'responded'  # Prevent further responses for this prompt
+        self.responses_accepted_counter.inc()
+        self.response_time_histogram.observe(response_time)
         logger.info(f"GameManager: Player {player_id}: {self.result_text} | Round Score: {self.round_score:.1f}")
+        if self.session_recorder:
+            self.session_recorder.record_response(self.current_round, player_id, self.prompt, user_gesture,
+                                                  self.result_text, response_time, confidence_score,
+                                                  self.round_score, self.score)
 
         # Update UI
         self.send_ui_message("result", self.result_text)
@@ -229,6 +364,26 @@ class GameManager:
 
         return True  # Response accepted
 
+    def on_state_synced(self, state_sync, changed_players):
+        """
+        Receive an update of the server's score table or of this player's round result.
+
+        :param state_sync: StateSync replica holding all players' scores and results
+        :param changed_players: Player IDs whose entries changed in this update
+        """
+        self.synced_state = state_sync
+        if self.player_id not in changed_players:
+            return
+        result = state_sync.results.get(self.player_id)
+        if result and result.get('round') != self.synced_result_round:
+            self.synced_result_round = result.get('round')
+            self.send_ui_message("result", f"Server: {result['result_text']}")
+        entry = state_sync.scores.get(self.player_id)
+        if entry:
+            rank = state_sync.rank(self.player_id)
+            self.send_ui_message("score", f"Server score: {entry.get('score', 0)} "
+                                          f"(rank {rank} of {len(state_sync.scores)})")
+
     async def reset(self):
         """
         Reset the game state.
@@ -239,6 +394,7 @@ class GameManager:
         self.prompt = None
         self.round_score = 0
         self.result_text = 'N/A'
+        self.synced_result_round = None
         logger.info("GameManager: Game has been reset.")
         self.send_ui_message("result", "Game has been reset.")
         self.send_ui_message("score", "Score: 0")
@@ -268,5 +424,9 @@ class GameManager:
         elif self.game_type == 'counting':
             self.game_logic = CountingGame(self)
 
+        # Hot-swap the detector's classifier; the MediaPipe graph is reused
+        if self.gesture_detector:
+            self.gesture_detector.set_mode(self.game_type)
+
         logger.info(f"GameManager: Game type changed to '{self.game_type}'.")
         self.send_ui_message("prompt", f"Game type changed to '{self.game_type}'.")
@@ -1,9 +1,18 @@
 # gesture_detection.py
 
-import cv2
 import mediapipe as mp
+import numpy as np
 from collections import deque, Counter
 import logging
+import threading
+
+from frame_buffers import FrameBuffers, preprocess_for_inference
+from landmark_classifier import LandmarkClassifier, landmarks_to_array
+from landmark_filter import OneEuroFilter
+from landmark_recording import LandmarkView
+from metrics import REGISTRY
+from quality_governor import QUALITY_LEVELS
+from thread_limits import apply_thread_limits
 
 import time
 
@@ -19,7 +28,16 @@ class GestureDetector:
 
 
 
-    def __init__(self, max_buffer_len=5, mode='rps'):
+    def __init__(self, max_buffer_len=5, mode='rps', num_threads=None, cpus=None):
+        """
+        :param max_buffer_len: Number of frames in the gesture vote window
+        :param mode: Game mode selecting the classifier
+        :param num_threads: Cap on OpenCV threads (None keeps the defaults); OpenMP/BLAS caps need preload_thread_env
+        :param cpus: CPUs to pin the calling thread, and the MediaPipe threads started here, to
+        """
+        if num_threads is not None or cpus is not None:
+            # Before the Hands graph is built, so its threads inherit the limits
+            apply_thread_limits(num_threads, cpus)
         self.last_gesture_time = 0
         self.debounce_time = 1  # seconds
         logger.info(f"GestureDetector: Initializing with mode '{mode}' and buffer length {max_buffer_len}.")
@@ -31,10 +49,143 @@ class GestureDetector:
             min_detection_confidence=0.7,
             min_tracking_confidence=0.7)
         self.mp_drawing = mp.solutions.drawing_utils
+        # Hands graphs by model complexity, so the quality governor can switch back without a reload
+        self.hands_by_complexity = {1: self.hands}
         self.gesture_buffer = deque(maxlen=max_buffer_len)
         self.current_gesture = 'None'
         self.gesture_confidence = 0
-        self.mode = mode  # 'rps' or 'count'
+        # Raw per-frame classification, before voting and debounce
+        self.frame_gesture = 'None'
+        self.frame_probability = None  # Set only by classifiers with calibrated probabilities
+
+        # Classifier registry: mode -> callable(hand_landmarks) -> gesture label
+        self.classifiers = {}
+        self.register_classifier('rps', self.classify_gesture_rps)
+        self.register_classifier('counting', self.count_fingers)
+        self.register_classifier('count', self.count_fingers)
+
+        # Mode switches requested from other threads are applied at the start of the next frame
+        self.mode_lock = threading.Lock()
+        self.pending_mode = None
+        self.arm_requested = False
+        self.mode = mode  # 'rps' or 'counting'
+        self.classifier = self.classifiers.get(mode)
+        if self.classifier is None:
+            logger.error(f"GestureDetector: No classifier registered for mode '{mode}'.")
+
+        # Optional LandmarkRecorder capturing every processed frame
+        self.recorder = None
+
+        # Temporal filter smoothing landmark jitter before classification (None to classify raw landmarks)
+        self.landmark_filter = OneEuroFilter()
+
+        # Reused preprocessing buffers (process_frame runs on a single thread)
+        self.frame_buffers = FrameBuffers()
+
+        # Runtime quality settings (see quality_governor.QUALITY_LEVELS), optionally
+        # driven by a QualityGovernor fed with every frame's processing time
+        self.quality = dict(QUALITY_LEVELS[0])
+        self.governor = None
+        self.skipped_frames = 0
+        self.frame_processed = False  # Whether the last process_frame call ran inference
+
+        # Metrics (updated on the per-frame path)
+        self.frames_counter = REGISTRY.counter('gesture_frames', 'Frames processed by the gesture detector')
+        self.hands_counter = REGISTRY.counter('gesture_hand_frames', 'Frames in which a hand was detected')
+        self.gesture_changes_counter = REGISTRY.counter('gesture_changes', 'Debounced gesture changes')
+        self.inference_histogram = REGISTRY.histogram('gesture_inference_seconds', 'MediaPipe Hands inference time')
+        self.frame_histogram = REGISTRY.histogram('gesture_frame_seconds', 'Total process_frame time')
+
+    def register_classifier(self, mode, classifier):
+        """
+        Register a gesture classifier for a game mode.
+
+        :param mode: Game mode the classifier serves (e.g., 'rps', 'counting')
+        :param classifier: Callable taking hand landmarks and returning a gesture label
+        """
+        self.classifiers[mode] = classifier
+        logger.debug(f"GestureDetector: Registered classifier for mode '{mode}'.")
+
+    def load_classifier_model(self, path):
+        """
+        Load a learned landmark classifier and register it for the mode it was trained on.
+
+        The learned classifier returns calibrated probabilities, which weight the
+        frame vote instead of counting every frame as one full vote.
+
+        :param path: Path to a model written by landmark_classifier.py
+        :return: The loaded model
+        """
+        model = LandmarkClassifier.load(path)
+        self.register_classifier(model.mode, model)
+        if model.mode == 'counting':
+            self.register_classifier('count', model)
+        if self.classifiers.get(self.mode) is model:
+            self.set_mode(self.mode)
+        return model
+
+    def set_mode(self, mode):
+        """
+        Hot-swap the active classifier without rebuilding the MediaPipe graph.
+
+        The switch is applied by the frame thread at the start of the next frame,
+        so the Hands instance and its tracking state are kept.
+
+        :param mode: Game mode to switch to
+        :return: True if the switch was scheduled, False if the mode is unknown
+        """
+        if mode not in self.classifiers:
+            logger.error(f"GestureDetector: No classifier registered for mode '{mode}'.")
+            return False
+        with self.mode_lock:
+            self.pending_mode = mode
+        logger.info(f"GestureDetector: Switching to mode '{mode}' on next frame.")
+        return True
+
+    def arm(self):
+        """
+        Start a fresh vote at the next frame, e.g. when a prompt goes live.
+
+        Clears the vote buffer and debounce so gestures shown before the prompt
+        do not count and the first stable gesture commits immediately.
+        """
+        self.arm_requested = True
+
+    def apply_pending_mode(self):
+        """
+        Apply a mode switch requested via set_mode, if any.
+        """
+        with self.mode_lock:
+            mode, self.pending_mode = self.pending_mode, None
+        if mode is None:
+            return
+        self.mode = mode
+        self.classifier = self.classifiers[mode]
+        # Votes from the previous mode are meaningless for the new classifier
+        self.gesture_buffer.clear()
+        self.current_gesture = 'None'
+        self.gesture_confidence = 0
+        self.last_gesture_time = 0
+        logger.info(f"GestureDetector: Mode switched to '{mode}'.")
+
+    def apply_quality(self, settings):
+        """
+        Apply quality settings from the frame thread.
+
+        :param settings: Dict with 'scale', 'model_complexity', 'blur' and 'frame_skip'
+        """
+        complexity = settings['model_complexity']
+        if complexity != self.quality['model_complexity']:
+            hands = self.hands_by_complexity.get(complexity)
+            if hands is None:
+                hands = self.mp_hands.Hands(
+                    max_num_hands=1,
+                    model_complexity=complexity,
+                    min_detection_confidence=0.7,
+                    min_tracking_confidence=0.7)
+                self.hands_by_complexity[complexity] = hands
+            self.hands = hands
+        self.quality = dict(settings)
 
     def classify_gesture_rps(self, hand_landmarks):
         """
@@ -119,46 +270,112 @@ class GestureDetector:
 
 
 
-    def process_frame(self, image):
-        # Existing preprocessing
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        image_rgb = cv2.GaussianBlur(image_rgb, (5, 5), 0)
-        results_hands = self.hands.process(image_rgb)
-        self.current_gesture = 'None'
-        self.gesture_confidence = 0
+    def process_frame(self, image, capture_time=None, timestamp=None):
+        """
+        Detect and classify the hand in a frame.
+
+        :param image: BGR frame
+        :param capture_time: time.perf_counter() at which the frame was captured, used by the
+            quality governor to measure lag
+        :param timestamp: Frame time in seconds for the vote and debounce (defaults to time.time(),
+            offline evaluation passes the clip time)
+        :return: The frame
+        """
+        frame_start = time.perf_counter()
+        if self.skipped_frames < self.quality['frame_skip']:
+            # Keep the previous result; get_frame_gesture() is not a new observation
+            self.skipped_frames += 1
+            self.frame_processed = False
+        else:
+            self.skipped_frames = 0
+            self.frame_processed = True
+            # Existing preprocessing, into preallocated buffers
+            image_rgb = preprocess_for_inference(image, self.frame_buffers,
+                                                 scale=self.quality['scale'], blur=self.quality['blur'])
+            inference_start = time.perf_counter()
+            results_hands = self.hands.process(image_rgb)
+            self.inference_histogram.observe(time.perf_counter() - inference_start)
+
+            current_time = time.time() if timestamp is None else timestamp
+            frame_gesture = self.process_landmarks(results_hands.multi_hand_landmarks, current_time)
+
+            if self.recorder:
+                self.recorder.record_results(current_time, results_hands, frame_gesture)
+
+            self.frames_counter.inc()
+
+        frame_end = time.perf_counter()
+        if self.frame_processed:
+            self.frame_histogram.observe(frame_end - frame_start)
+        if self.governor:
+            lag = frame_end - capture_time if capture_time is not None else 0.0
+            settings = self.governor.observe(frame_end - frame_start, lag)
+            if settings:
+                self.apply_quality(settings)
+        return image
 
-        current_time = time.time()
+    def process_landmarks(self, multi_hand_landmarks, current_time):
+        """
+        Classify detected hands and update the vote and debounced gesture.
+
+        Split from process_frame so recorded landmarks can be replayed without MediaPipe.
+
+        :param multi_hand_landmarks: Detected hands (MediaPipe landmark lists or LandmarkView), or None
+        :param current_time: Frame timestamp in seconds
+        :return: The per-frame gesture label before voting
+        """
+        if self.pending_mode is not None:
+            self.apply_pending_mode()
+        if self.arm_requested:
+            self.arm_requested = False
+            self.gesture_buffer.clear()
+            self.last_gesture_time = 0
 
-        if results_hands.multi_hand_landmarks:
-            for hand_landmarks in results_hands.multi_hand_landmarks:
+        self.current_gesture = 'None'
+        self.gesture_confidence = 0
+        gesture = 'None'
+
+        if multi_hand_landmarks:
+            self.hands_counter.inc()
+            if self.landmark_filter is not None:
+                # All hands in one vectorized step; hand i is filtered as stream i
+                points = np.stack([landmarks_to_array(hand) for hand in multi_hand_landmarks])
+                multi_hand_landmarks = [LandmarkView(hand) for hand in self.landmark_filter(points, current_time)]
+            for hand_landmarks in multi_hand_landmarks:
                 # Existing drawing and classification
-                if self.mode == 'rps':
-                    gesture = self.classify_gesture_rps(hand_landmarks)
-                elif self.mode == 'count':
-                    gesture = self.count_fingers(hand_landmarks)
+                if self.classifier:
+                    result = self.classifier(hand_landmarks)
                 else:
-                    gesture = 'Unknown'
+                    result = 'Unknown'
+                # Learned classifiers return (gesture, probability); rule-based ones a bare label
+                gesture, weight = result if isinstance(result, tuple) else (result, 1.0)
+                self.frame_probability = result[1] if isinstance(result, tuple) else None
 
-                self.gesture_buffer.append(gesture)
+                self.gesture_buffer.append((gesture, weight))
 
-                gesture_counts = Counter(self.gesture_buffer)
-                most_common_gesture, count = gesture_counts.most_common(1)[0]
-                self.gesture_confidence = count / self.gesture_buffer.maxlen
+                gesture_votes = Counter()
+                for buffered_gesture, buffered_weight in self.gesture_buffer:
+                    gesture_votes[buffered_gesture] += buffered_weight
+                most_common_gesture, votes = gesture_votes.most_common(1)[0]
+                self.gesture_confidence = votes / self.gesture_buffer.maxlen
 
                 if (most_common_gesture != self.current_gesture and 
                     (current_time - self.last_gesture_time) > self.debounce_time):
                     logger.info(f"GestureDetector: Gesture changed to '{most_common_gesture}' with confidence {self.gesture_confidence:.2f}.")
                     self.current_gesture = most_common_gesture
                     self.last_gesture_time = current_time
+                    self.gesture_changes_counter.inc()
         else:
-            self.gesture_buffer.append('None')
+            self.gesture_buffer.append(('None', 1.0))
+            self.frame_probability = None
             if self.current_gesture != 'None' and (current_time - self.last_gesture_time) > self.debounce_time:
                 logger.info("GestureDetector: No hand detected.")
                 self.current_gesture = 'None'
                 self.gesture_confidence = 0
                 self.last_gesture_time = current_time
 
-        return image
+        self.frame_gesture = gesture
+        return gesture
 
 
     def get_gesture(self):
@@ -170,9 +387,18 @@ class GestureDetector:
         logger.debug(f"GestureDetector: Current gesture '{self.current_gesture}' with confidence {self.gesture_confidence:.2f}.")
         return self.current_gesture, self.gesture_confidence
 
+    def get_frame_gesture(self):
+        """
+        Retrieve the latest per-frame classification, before voting and debounce.
+
+        :return: Tuple of (gesture, probability), probability being None for rule-based classifiers
+        """
+        return self.frame_gesture, self.frame_probability
+
     def release(self):
         """
         Release MediaPipe resources.
         """
         logger.info("GestureDetector: Releasing MediaPipe resources.")
-        self.hands.close()
+        for hands in self.hands_by_complexity.values():
+            hands.close()
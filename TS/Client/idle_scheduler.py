@@ -0,0 +1,242 @@
+# idle_scheduler.py
+
+import argparse
+import logging
+import math
+import random
+import threading
+from types import SimpleNamespace
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+class IdleScheduler:
+    """
+    State-aware pacing of the webcam loop.
+
+    Gestures only matter while a prompt is armed or live and unanswered. The
+    rest of the time (waiting for the server, or after responding) the loop
+    drops to `idle_fps` and runs inference on at most one frame every
+    `idle_inference_interval` seconds, which keeps the MediaPipe graph warm
+    and the preview and overlay alive.
+
+    The loop returns to full rate:
+      - as soon as the GameManager arms or starts a prompt (it calls wake(),
+        which interrupts the idle sleep), and
+      - `wake_ahead` seconds before the next prompt is due, as announced by
+        the server ('armed') or predicted from the spacing of past prompts.
+
+    The camera keeps grabbing at its negotiated rate the whole time, so the
+    first frame after a wake-up is as fresh as in the active loop; frames not
+    read while idle are never decoded.
+    """
+
+    def __init__(self, game_manager, idle_fps=5, idle_inference_interval=1.0, wake_ahead=0.5):
+        """
+        :param game_manager: GameManager whose game_state drives the schedule
+        :param idle_fps: Loop rate while idle
+        :param idle_inference_interval: Seconds between sampled inferences while idle; 0 pauses inference
+        :param wake_ahead: Seconds before an expected prompt at which to return to full rate
+        """
+        self.game_manager = game_manager
+        self.idle_interval = 1.0 / idle_fps
+        self.idle_inference_interval = idle_inference_interval
+        self.wake_ahead = wake_ahead
+        self.wake_event = threading.Event()
+
+        self.active = True
+        self.last_inference = float('-inf')
+        self.last_prompt_time = None  # Start of the most recent prompt seen
+        self.prompt_period = None  # Spacing between the last two prompt starts
+
+        self.active_gauge = REGISTRY.gauge('idle_scheduler_active', 'Whether the webcam loop runs at full rate')
+        self.idle_frames_counter = REGISTRY.counter('idle_scheduler_idle_frames', 'Idle frames shown without inference')
+        self.wakeups_counter = REGISTRY.counter('idle_scheduler_wakeups', 'Returns from idle to full rate')
+        self.active_gauge.set(1)
+
+    def wake(self):
+        """
+        Return to full rate at once. Safe to call from any thread.
+        """
+        self.wake_event.set()
+
+    def expected_prompt_time(self):
+        """
+        :return: GameManager clock time at which the next prompt is expected to start, or None
+        """
+        game_manager = self.game_manager
+        if game_manager.next_prompt_time is not None:
+            return game_manager.next_prompt_time
+        if self.last_prompt_time is not None and self.prompt_period is not None:
+            return self.last_prompt_time + self.prompt_period
+        return None
+
+    def wake_in(self):
+        """
+        :return: Seconds until the loop must be back at full rate, or None if no prompt is expected
+        """
+        expected = self.expected_prompt_time()
+        if expected is None:
+            return None
+        return expected - self.wake_ahead - self.game_manager.clock()
+
+    def update(self):
+        """
+        Re-evaluate the game state.
+
+        :return: True if the loop should run at full rate
+        """
+        game_manager = self.game_manager
+        prompt_time = game_manager.prompt_time
+        if prompt_time is not None and prompt_time != self.last_prompt_time:
+            if self.last_prompt_time is not None:
+                self.prompt_period = prompt_time - self.last_prompt_time
+            self.last_prompt_time = prompt_time
+
+        state = game_manager.game_state
+        if state == 'armed' or (state == 'prompted' and not game_manager.response_sent):
+            active = True
+        else:
+            wake_in = self.wake_in()
+            active = wake_in is not None and wake_in <= 0
+
+        if active != self.active:
+            self.active = active
+            self.active_gauge.set(1 if active else 0)
+            if active:
+                self.wakeups_counter.inc()
+                logger.debug(f"IdleScheduler: Full rate ({state}).")
+            else:
+                logger.debug(f"IdleScheduler: Idle ({state}).")
+        return active
+
+    def wait(self):
+        """
+        Pace the webcam loop; call once before reading each frame.
+
+        Returns immediately while active. While idle, sleeps for one idle frame
+        interval, less if a prompt is due sooner, and wakes early on wake().
+
+        :return: True if the next frame should run inference
+        """
+        if not self.update():
+            timeout = self.idle_interval
+            wake_in = self.wake_in()
+            if wake_in is not None:
+                timeout = min(timeout, max(0.0, wake_in))
+            if self.wake_event.wait(timeout):
+                self.wake_event.clear()
+            if not self.update():
+                now = self.game_manager.clock()
+                if 0 < self.idle_inference_interval <= now - self.last_inference:
+                    self.last_inference = now
+                    return True
+                self.idle_frames_counter.inc()
+                return False
+        self.last_inference = self.game_manager.clock()
+        return True
+
+
+def simulate(scheduler_kwargs, rounds=10, camera_fps=30, lead=1.0, response_timeout=7.0, interval=3.0,
+             response_time=0.8, jitter=0.05, clock_synced=True, idle=True, seed=0):
+    """
+    Replay server rounds (TS/Server/gameManager.js timing) against the scheduler on a virtual clock.
+
+    :param jitter: Maximum prompt delivery delay (s), uniformly distributed
+    :param clock_synced: Whether prompts are armed 'lead' seconds ahead; otherwise they start on arrival
+    :param idle: Run the scheduler; False models the always-on loop
+    :return: Dict with inferences per second and the worst delay from a prompt start to its first inference
+    """
+    from simulation import VirtualClock
+
+    clock = VirtualClock()
+    game_manager = SimpleNamespace(game_state='waiting', response_sent=False, prompt_time=None,
+                                   next_prompt_time=None, clock=clock.time)
+    scheduler = IdleScheduler(game_manager, **scheduler_kwargs)
+
+    rng = random.Random(seed)
+    # Timeline of (time, state, prompt_time, next_prompt_time, response_sent)
+    period = interval + lead + response_timeout + 2.0
+    events = []
+    for i in range(rounds):
+        arrival = (i + 1) * period + rng.uniform(0, jitter)
+        go = arrival + lead if clock_synced else arrival
+        if clock_synced:
+            events.append((arrival, 'armed', None, go, False))
+        events.append((go, 'prompted', go, None, False))
+        events.append((go + response_time, 'responded', go, None, True))
+    events.sort(key=lambda event: event[0])
+    end = (rounds + 1) * period
+
+    def apply_events():
+        applied = False
+        while events and events[0][0] <= clock.now:
+            _, state, prompt_time, next_prompt_time, response_sent = events.pop(0)
+            game_manager.game_state = state
+            game_manager.next_prompt_time = next_prompt_time
+            game_manager.response_sent = response_sent
+            if prompt_time is not None:
+                game_manager.prompt_time = prompt_time
+            if state in ('armed', 'prompted'):
+                applied = True
+        return applied
+
+    class VirtualWake:
+        # Advances the clock instead of sleeping, waking early at game events
+        def wait(self, timeout):
+            target = clock.now + timeout
+            if events and events[0][0] < target:
+                target = events[0][0]
+            clock.now = target
+            return apply_events()
+
+        def clear(self):
+            pass
+
+    scheduler.wake_event = VirtualWake()
+    frame = 0  # Index of the next camera frame
+    inferences = 0
+    measured_prompt = None
+    worst_delay = 0.0
+    while clock.now < end:
+        apply_events()
+        infer = scheduler.wait() if idle else True
+        # Frames arrive on the camera's grid; read() returns the next one
+        frame = max(frame, math.ceil(clock.now * camera_fps - 1e-9))
+        clock.now = frame / camera_fps
+        frame += 1
+        apply_events()
+        if not infer:
+            continue
+        inferences += 1
+        prompt_time = game_manager.prompt_time
+        if prompt_time is not None and prompt_time != measured_prompt and clock.now >= prompt_time:
+            worst_delay = max(worst_delay, clock.now - prompt_time)
+            measured_prompt = prompt_time
+    return {'inferences_per_second': inferences / end, 'worst_first_frame_delay': worst_delay}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare inference rate and prompt latency with and without idle pacing.")
+    parser.add_argument("--idle-fps", type=float, default=5, help="Loop rate while idle")
+    parser.add_argument("--idle-inference-interval", type=float, default=1.0,
+                        help="Seconds between sampled inferences while idle (0 pauses inference)")
+    parser.add_argument("--wake-ahead", type=float, default=0.5, help="Seconds before an expected prompt to wake")
+    parser.add_argument("--rounds", type=int, default=20, help="Simulated rounds")
+    parser.add_argument("--camera-fps", type=int, default=30, help="Camera frame rate")
+    args = parser.parse_args()
+
+    kwargs = {'idle_fps': args.idle_fps, 'idle_inference_interval': args.idle_inference_interval,
+              'wake_ahead': args.wake_ahead}
+    print(f"{'prompts':<14}{'loop':<8}{'inferences/s':>14}{'first frame delay':>20}")
+    for clock_synced in (True, False):
+        for idle in (False, True):
+            r = simulate(kwargs, rounds=args.rounds, camera_fps=args.camera_fps, clock_synced=clock_synced, idle=idle)
+            print(f"{'armed ahead' if clock_synced else 'unannounced':<14}{'idle' if idle else 'always':<8}"
+                  f"{r['inferences_per_second']:>14.2f}{r['worst_first_frame_delay'] * 1000:>17.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
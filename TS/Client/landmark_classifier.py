@@ -0,0 +1,352 @@
+# landmark_classifier.py
+
+import argparse
+import logging
+from abc import ABC, abstractmethod
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+NUM_LANDMARKS = 21
+WRIST = 0
+INDEX_FINGER_MCP = 5
+MIDDLE_FINGER_MCP = 9
+PINKY_MCP = 17
+
+
+def landmarks_to_array(hand_landmarks):
+    """
+    Convert MediaPipe hand landmarks to a (21, 3) float32 array.
+
+    :param hand_landmarks: MediaPipe NormalizedLandmarkList
+    :return: numpy array of shape (21, 3)
+    """
+    if hasattr(hand_landmarks, 'array'):
+        # Replayed LandmarkView already holds the array
+        return hand_landmarks.array
+    return np.array([(lm.x, lm.y, lm.z) for lm in hand_landmarks.landmark], dtype=np.float32)
+
+
+def normalize_landmarks(landmarks):
+    """
+    Turn raw landmarks into pose-invariant feature vectors.
+
+    Landmarks are translated to the wrist, rotated so the wrist -> middle MCP
+    axis points up, scaled by the palm length and mirrored so left and right
+    hands share one canonical orientation.
+
+    :param landmarks: Array of shape (21, 3) or (N, 21, 3)
+    :return: Feature array of shape (N, 60)
+    """
+    pts = np.asarray(landmarks, dtype=np.float32).reshape(-1, NUM_LANDMARKS, 3)
+    pts = pts - pts[:, WRIST:WRIST + 1, :]
+
+    # Rotate in the image plane so the palm axis points towards -y (up)
+    axis = pts[:, MIDDLE_FINGER_MCP, :2]
+    palm_len = np.linalg.norm(axis, axis=1)
+    palm_len = np.where(palm_len > 1e-6, palm_len, 1.0)
+    cos = -axis[:, 1] / palm_len
+    sin = -axis[:, 0] / palm_len
+    x = pts[:, :, 0] * cos[:, None] - pts[:, :, 1] * sin[:, None]
+    y = pts[:, :, 0] * sin[:, None] + pts[:, :, 1] * cos[:, None]
+
+    # Mirror so the index finger is always on the left of the pinky
+    flip = np.where(x[:, INDEX_FINGER_MCP] > x[:, PINKY_MCP], -1.0, 1.0).astype(np.float32)
+    x = x * flip[:, None]
+
+    feats = np.stack([x, y, pts[:, :, 2]], axis=-1) / palm_len[:, None, None]
+    return feats[:, 1:, :].reshape(len(pts), -1)
+
+
+class LandmarkClassifier(ABC):
+    """
+    Base class for learned landmark classifiers with a batched API.
+
+    Subclasses implement fit, predict_proba_features and set_params.
+    """
+    kind = None
+
+    def __init__(self, classes, mode=None):
+        self.classes = np.asarray(classes)
+        self.mode = mode  # Game mode the labels belong to ('rps' or 'counting')
+
+    @abstractmethod
+    def fit(self, landmarks, labels):
+        """
+        Train on a batch of landmark sets of shape (N, 21, 3) and their labels.
+        """
+
+    @abstractmethod
+    def predict_proba_features(self, features):
+        """
+        :param features: Normalized features of shape (N, 60)
+        :return: Array of shape (N, num_classes), rows sum to 1
+        """
+
+    def predict_proba(self, landmarks):
+        """
+        Predict class probabilities for a batch of landmark sets.
+
+        :param landmarks: Array of shape (N, 21, 3)
+        :return: Array of shape (N, num_classes), rows sum to 1
+        """
+        return self.predict_proba_features(normalize_landmarks(landmarks))
+
+    def predict(self, landmarks):
+        """
+        Predict labels for a batch of landmark sets.
+
+        :param landmarks: Array of shape (N, 21, 3)
+        :return: Tuple of (labels, confidences), both of length N
+        """
+        proba = self.predict_proba(landmarks)
+        idx = proba.argmax(axis=1)
+        return self.classes[idx], proba[np.arange(len(idx)), idx]
+
+    def __call__(self, hand_landmarks):
+        """
+        Classify a single MediaPipe hand, matching the GestureDetector classifier interface.
+
+        :return: Tuple of (gesture, probability)
+        """
+        labels, confidences = self.predict(landmarks_to_array(hand_landmarks)[None])
+        return str(labels[0]), float(confidences[0])
+
+    def get_params(self):
+        return {}
+
+    @abstractmethod
+    def set_params(self, params):
+        """
+        Restore the state returned by get_params().
+        """
+
+    def save(self, path):
+        """
+        Save the model to an .npz file.
+        """
+        np.savez(path, kind=self.kind, classes=self.classes, mode=str(self.mode), **self.get_params())
+        logger.info(f"LandmarkClassifier: Saved {self.kind} model to {path}")
+
+    @staticmethod
+    def load(path):
+        """
+        Load a model previously written by save().
+        """
+        with np.load(path, allow_pickle=False) as data:
+            kind = str(data['kind'])
+            mode = str(data['mode'])
+            model_cls = MODEL_TYPES.get(kind)
+            if model_cls is None:
+                raise ValueError(f"Unknown landmark classifier kind '{kind}'")
+            model = model_cls(data['classes'], mode=None if mode == 'None' else mode)
+            model.set_params({key: data[key] for key in data.files if key not in ('kind', 'classes', 'mode')})
+        logger.info(f"LandmarkClassifier: Loaded {kind} model for mode '{model.mode}' from {path}")
+        return model
+
+
+class KNNClassifier(LandmarkClassifier):
+    """
+    Distance-weighted k-nearest-neighbour classifier on normalized landmarks.
+    """
+    kind = 'knn'
+
+    def __init__(self, classes=(), mode=None, k=7, smoothing=0.5):
+        super().__init__(classes, mode)
+        self.k = k
+        self.smoothing = smoothing  # Additive smoothing keeps probabilities away from 0/1
+        self.features = None
+        self.targets = None
+
+    def fit(self, landmarks, labels):
+        labels = np.asarray(labels)
+        self.classes, self.targets = np.unique(labels, return_inverse=True)
+        self.features = normalize_landmarks(landmarks)
+        return self
+
+    def predict_proba_features(self, features):
+        k = min(self.k, len(self.features))
+        # Squared distances via |a|^2 - 2ab + |b|^2 for the whole batch at once
+        d2 = (np.sum(features ** 2, axis=1)[:, None]
+              - 2.0 * features @ self.features.T
+              + np.sum(self.features ** 2, axis=1)[None, :])
+        nearest = np.argpartition(d2, k - 1, axis=1)[:, :k]
+        weights = 1.0 / (np.sqrt(np.maximum(np.take_along_axis(d2, nearest, axis=1), 0)) + 1e-3)
+        votes = np.zeros((len(features), len(self.classes)), dtype=np.float64)
+        np.add.at(votes, (np.arange(len(features))[:, None], self.targets[nearest]), weights)
+        votes /= votes.sum(axis=1, keepdims=True)
+        votes = votes * k + self.smoothing
+        return votes / votes.sum(axis=1, keepdims=True)
+
+    def get_params(self):
+        return {'k': self.k, 'smoothing': self.smoothing, 'features': self.features, 'targets': self.targets}
+
+    def set_params(self, params):
+        self.k = int(params['k'])
+        self.smoothing = float(params['smoothing'])
+        self.features = params['features']
+        self.targets = params['targets']
+
+
+class MLPClassifier(LandmarkClassifier):
+    """
+    One-hidden-layer NumPy MLP with temperature-scaled (calibrated) softmax output.
+    """
+    kind = 'mlp'
+
+    def __init__(self, classes=(), mode=None, hidden=64, epochs=300, learning_rate=0.01, l2=1e-4, seed=0):
+        super().__init__(classes, mode)
+        self.hidden = hidden
+        self.epochs = epochs
+        self.learning_rate = learning_rate
+        self.l2 = l2
+        self.seed = seed
+        self.mean = self.std = None
+        self.w1 = self.b1 = self.w2 = self.b2 = None
+        self.temperature = 1.0
+
+    def logits(self, features):
+        x = (features - self.mean) / self.std
+        h = np.maximum(x @ self.w1 + self.b1, 0)
+        return h @ self.w2 + self.b2
+
+    @staticmethod
+    def softmax(z):
+        z = z - z.max(axis=1, keepdims=True)
+        e = np.exp(z)
+        return e / e.sum(axis=1, keepdims=True)
+
+    def fit(self, landmarks, labels, validation_split=0.2):
+        rng = np.random.default_rng(self.seed)
+        labels = np.asarray(labels)
+        self.classes, targets = np.unique(labels, return_inverse=True)
+        features = normalize_landmarks(landmarks)
+
+        order = rng.permutation(len(features))
+        n_val = int(len(features) * validation_split) if len(features) >= 10 else 0
+        val_idx, train_idx = order[:n_val], order[n_val:]
+        x, y = features[train_idx], targets[train_idx]
+
+        self.mean = x.mean(axis=0)
+        self.std = x.std(axis=0) + 1e-6
+        n_in, n_out = x.shape[1], len(self.classes)
+        self.w1 = rng.normal(0, np.sqrt(2.0 / n_in), (n_in, self.hidden)).astype(np.float32)
+        self.b1 = np.zeros(self.hidden, dtype=np.float32)
+        self.w2 = rng.normal(0, np.sqrt(1.0 / self.hidden), (self.hidden, n_out)).astype(np.float32)
+        self.b2 = np.zeros(n_out, dtype=np.float32)
+
+        # Full-batch Adam
+        params = [self.w1, self.b1, self.w2, self.b2]
+        m = [np.zeros_like(p) for p in params]
+        v = [np.zeros_like(p) for p in params]
+        onehot = np.eye(n_out, dtype=np.float32)[y]
+        xs = (x - self.mean) / self.std
+        for step in range(1, self.epochs + 1):
+            pre = xs @ self.w1 + self.b1
+            h = np.maximum(pre, 0)
+            p = self.softmax(h @ self.w2 + self.b2)
+            dz = (p - onehot) / len(xs)
+            dh = (dz @ self.w2.T) * (pre > 0)
+            grads = [xs.T @ dh + self.l2 * self.w1, dh.sum(axis=0),
+                     h.T @ dz + self.l2 * self.w2, dz.sum(axis=0)]
+            for i, (param, grad) in enumerate(zip(params, grads)):
+                m[i] = 0.9 * m[i] + 0.1 * grad
+                v[i] = 0.999 * v[i] + 0.001 * grad ** 2
+                m_hat = m[i] / (1 - 0.9 ** step)
+                v_hat = v[i] / (1 - 0.999 ** step)
+                param -= self.learning_rate * m_hat / (np.sqrt(v_hat) + 1e-8)
+
+        if n_val:
+            self.calibrate(features[val_idx], targets[val_idx])
+        return self
+
+    def calibrate(self, features, targets):
+        """
+        Fit the softmax temperature on held-out data by minimizing negative log-likelihood.
+        """
+        logits = self.logits(features)
+        best_nll, best_t = np.inf, 1.0
+        for t in np.logspace(-1, 1, 41):
+            p = self.softmax(logits / t)
+            nll = -np.mean(np.log(p[np.arange(len(targets)), targets] + 1e-12))
+            if nll < best_nll:
+                best_nll, best_t = nll, t
+        self.temperature = float(best_t)
+        logger.info(f"MLPClassifier: Calibrated temperature {self.temperature:.2f} (NLL {best_nll:.3f}).")
+
+    def predict_proba_features(self, features):
+        return self.softmax(self.logits(features) / self.temperature)
+
+    def get_params(self):
+        return {'mean': self.mean, 'std': self.std, 'w1': self.w1, 'b1': self.b1,
+                'w2': self.w2, 'b2': self.b2, 'temperature': self.temperature}
+
+    def set_params(self, params):
+        for key in ('mean', 'std', 'w1', 'b1', 'w2', 'b2'):
+            setattr(self, key, params[key])
+        self.temperature = float(params['temperature'])
+
+
+MODEL_TYPES = {
+    KNNClassifier.kind: KNNClassifier,
+    MLPClassifier.kind: MLPClassifier,
+}
+
+
+def load_dataset(paths):
+    """
+    Load and concatenate labelled landmark datasets.
+
+    Each .npz file must contain 'landmarks' (N, 21, 3) and 'labels' (N,).
+    Landmark recordings (.lmrec) are also accepted; frames with a hand and a
+    recognised gesture are used, labelled with the recorded gesture.
+
+    :param paths: Iterable of dataset file paths
+    :return: Tuple of (landmarks, labels)
+    """
+    from landmark_recording import LandmarkReplay
+
+    all_landmarks, all_labels = [], []
+    for path in paths:
+        if path.endswith('.lmrec'):
+            replay = LandmarkReplay(path)
+            labels = replay.gestures
+            keep = (replay.records['has_hand'] == 1) & (labels != 'None') & (labels != 'Unknown')
+            all_landmarks.append(np.asarray(replay.records['landmarks'][keep]))
+            all_labels.append(labels[keep])
+        else:
+            with np.load(path, allow_pickle=False) as data:
+                all_landmarks.append(data['landmarks'].astype(np.float32))
+                all_labels.append(data['labels'].astype(str))
+        logger.info(f"LandmarkClassifier: Loaded {len(all_labels[-1])} samples from {path}")
+    return np.concatenate(all_landmarks), np.concatenate(all_labels)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Train a learned landmark classifier.")
+    parser.add_argument("datasets", nargs="+", help="Labelled landmark datasets (.npz) or recordings (.lmrec)")
+    parser.add_argument("--model", choices=sorted(MODEL_TYPES), default="mlp", help="Classifier type")
+    parser.add_argument("--mode", choices=["rps", "counting"], required=True, help="Game mode the labels belong to")
+    parser.add_argument("--output", "-o", required=True, help="Where to write the trained model (.npz)")
+    parser.add_argument("--test-split", type=float, default=0.2, help="Fraction of samples held out for evaluation")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for the train/test split")
+    args = parser.parse_args()
+
+    landmarks, labels = load_dataset(args.datasets)
+    order = np.random.default_rng(args.seed).permutation(len(labels))
+    n_test = int(len(labels) * args.test_split)
+    test_idx, train_idx = order[:n_test], order[n_test:]
+
+    model = MODEL_TYPES[args.model](mode=args.mode)
+    model.fit(landmarks[train_idx], labels[train_idx])
+    if n_test:
+        predicted, _ = model.predict(landmarks[test_idx])
+        accuracy = np.mean(predicted == labels[test_idx])
+        logger.info(f"LandmarkClassifier: Held-out accuracy {accuracy:.3f} on {n_test} samples.")
+    model.save(args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# landmark_recording.py
+
+import argparse
+import asyncio
+import logging
+import struct
+import time
+from collections import Counter
+
+import numpy as np
+
+from landmark_classifier import NUM_LANDMARKS
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'TSLMREC\x00'
+VERSION = 1
+HEADER = struct.Struct('<8sII')  # magic, version, record size
+
+# Fixed gesture vocabulary so the gesture column is a single byte
+GESTURES = ('None', 'Unknown', 'Rock', 'Paper', 'Scissors', '0', '1', '2', '3', '4', '5')
+GESTURE_INDEX = {gesture: i for i, gesture in enumerate(GESTURES)}
+
+HANDEDNESS = {'Left': 0, 'Right': 1}
+HANDEDNESS_LABELS = {0: 'Left', 1: 'Right'}
+
+RECORD_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('landmarks', '<f4', (NUM_LANDMARKS, 3)),
+    ('has_hand', 'u1'),
+    ('handedness', 'i1'),  # -1 unknown, 0 left, 1 right
+    ('gesture', 'u1'),     # Index into GESTURES
+    ('reserved', 'u1'),
+])
+
+
+class LandmarkPoint:
+    __slots__ = ('x', 'y', 'z')
+
+    def __init__(self, x, y, z):
+        self.x = x
+        self.y = y
+        self.z = z
+
+
+class LandmarkView:
+    """
+    Minimal stand-in for a MediaPipe NormalizedLandmarkList backed by a (21, 3) array.
+
+    Rule-based classifiers read `.landmark[i].x/.y`; learned classifiers use `.array` directly.
+    """
+    __slots__ = ('array', 'landmark')
+
+    def __init__(self, array):
+        self.array = array
+        self.landmark = [LandmarkPoint(*point) for point in array.tolist()]
+
+
+class LandmarkRecorder:
+    """
+    Append per-frame landmarks, handedness and gesture to a compact binary file.
+
+    The file is a 16-byte header followed by fixed-size RECORD_DTYPE records,
+    so it can be memory-mapped directly by LandmarkReplay.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(HEADER.pack(MAGIC, VERSION, RECORD_DTYPE.itemsize))
+        self.record_buffer = np.zeros(1, dtype=RECORD_DTYPE)
+        self.frames_recorded = 0
+        logger.info(f"LandmarkRecorder: Recording landmarks to {path}")
+
+    def record(self, timestamp, landmarks=None, handedness=None, gesture='None'):
+        """
+        Append one frame.
+
+        :param timestamp: Frame timestamp in seconds
+        :param landmarks: Array of shape (21, 3), or None if no hand was detected
+        :param handedness: 'Left', 'Right' or None
+        :param gesture: Gesture label detected for this frame
+        """
+        rec = self.record_buffer[0]
+        rec['timestamp'] = timestamp
+        if landmarks is None:
+            rec['landmarks'] = 0
+            rec['has_hand'] = 0
+        else:
+            rec['landmarks'] = landmarks
+            rec['has_hand'] = 1
+        rec['handedness'] = HANDEDNESS.get(handedness, -1)
+        rec['gesture'] = GESTURE_INDEX.get(gesture, GESTURE_INDEX['Unknown'])
+        self.file.write(self.record_buffer.tobytes())
+        self.frames_recorded += 1
+
+    def record_results(self, timestamp, results_hands, gesture):
+        """
+        Append one frame straight from MediaPipe Hands results.
+        """
+        landmarks = handedness = None
+        if results_hands.multi_hand_landmarks:
+            hand = results_hands.multi_hand_landmarks[0]
+            landmarks = [(lm.x, lm.y, lm.z) for lm in hand.landmark]
+            if results_hands.multi_handedness:
+                handedness = results_hands.multi_handedness[0].classification[0].label
+        self.record(timestamp, landmarks, handedness, gesture)
+
+    def close(self):
+        self.file.close()
+        logger.info(f"LandmarkRecorder: Wrote {self.frames_recorded} frames to {self.path}")
+
+
+class LandmarkReplay:
+    """
+    Memory-mapped reader for files written by LandmarkRecorder.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            magic, version, record_size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC or version != VERSION or record_size != RECORD_DTYPE.itemsize:
+            raise ValueError(f"{path} is not a version {VERSION} landmark recording")
+        self.path = path
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER.size)
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def gestures(self):
+        """
+        Recorded per-frame gesture labels as a string array.
+        """
+        return np.asarray(GESTURES)[self.records['gesture']]
+
+    def frames(self):
+        """
+        Yield (timestamp, hands, handedness, gesture) per frame, where hands is
+        a list with one LandmarkView or None, as MediaPipe would report it.
+        """
+        for rec in self.records:
+            hands = [LandmarkView(rec['landmarks'])] if rec['has_hand'] else None
+            yield (float(rec['timestamp']), hands,
+                   HANDEDNESS_LABELS.get(int(rec['handedness'])), GESTURES[rec['gesture']])
+
+    def replay(self, detector):
+        """
+        Drive a GestureDetector's classifier, vote and debounce logic from the recording.
+
+        :param detector: GestureDetector instance (its MediaPipe graph is not used)
+        :return: List of (timestamp, gesture, confidence) for every frame
+        """
+        output = []
+        for timestamp, hands, _, _ in self.frames():
+            detector.process_landmarks(hands, timestamp)
+            gesture, confidence = detector.current_gesture, detector.gesture_confidence
+            output.append((timestamp, gesture, confidence))
+        return output
+
+    async def replay_game(self, detector, game_manager, min_confidence=0.6):
+        """
+        Play local rounds against a GameManager using the recorded hand stream.
+
+        A local prompt is raised whenever no prompt is active; the first gesture
+        committed by the detector afterwards is submitted as the response, with
+        its response time measured in recording time.
+
+        :param detector: GestureDetector instance
+        :param game_manager: GameManager in local mode
+        :param min_confidence: Minimum vote confidence for a submission
+        :return: Number of responses the GameManager accepted
+        """
+        responses = 0
+        prompt_time = None
+        for timestamp, hands, _, _ in self.frames():
+            if game_manager.game_state != 'prompted':
+                game_manager.current_round += 1
+                await game_manager.get_prompt_local()
+                prompt_time = timestamp
+            detector.process_landmarks(hands, timestamp)
+            gesture, confidence = detector.current_gesture, detector.gesture_confidence
+            if gesture != 'None' and confidence >= min_confidence:
+                accepted = await game_manager.receive_response(
+                    player_id=game_manager.player_id,
+                    user_gesture=gesture,
+                    response_time=timestamp - prompt_time,
+                    confidence_score=confidence
+                )
+                if accepted:
+                    responses += 1
+        return responses
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='[%(asctime)s] %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Replay a landmark recording through GestureDetector.")
+    parser.add_argument("recording", help="Recording written with main.py --record")
+    parser.add_argument("game_type", choices=["rps", "counting"], help="Type of the game")
+    parser.add_argument("--classifier-model", help="Learned landmark classifier (.npz)")
+    parser.add_argument("--vote-frames", type=int, default=5, help="Number of frames in the gesture vote window")
+    parser.add_argument("--debounce", type=float, default=1.0, help="Debounce time in seconds")
+    parser.add_argument("--game", action="store_true", help="Also play local GameManager rounds from the recording")
+    args = parser.parse_args()
+
+    from gesture_detection import GestureDetector
+
+    replay = LandmarkReplay(args.recording)
+    detector = GestureDetector(max_buffer_len=args.vote_frames, mode=args.game_type)
+    detector.debounce_time = args.debounce
+    if args.classifier_model:
+        detector.load_classifier_model(args.classifier_model)
+    # Keep per-frame gesture changes out of the console during replay
+    logging.getLogger('gesture_detection').setLevel(logging.WARNING)
+
+    start = time.perf_counter()
+    if args.game:
+        from game_manager import GameManager
+        game_manager = GameManager(game_type=args.game_type, mode='local')
+        responses = asyncio.run(replay.replay_game(detector, game_manager))
+        logger.info(f"Replay: {responses} responses accepted, total score {game_manager.score:.1f}")
+    else:
+        output = replay.replay(detector)
+        commits = Counter(gesture for _, gesture, _ in output if gesture != 'None')
+        logger.info(f"Replay: Committed gestures: {dict(commits)}")
+    elapsed = time.perf_counter() - start
+    detector.release()
+    logger.info(f"Replay: {len(replay)} frames in {elapsed:.3f}s ({len(replay) / max(elapsed, 1e-9):.0f} frames/s)")
+
+
+if __name__ == "__main__":
+    main()
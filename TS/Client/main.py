@@ -1,7 +1,12 @@
 # main.py
 
-import cv2
 import sys
+from thread_limits import apply_thread_limits, parse_cpu_list, preload_thread_env
+
+# OpenMP/BLAS/TFLite read their thread counts when they load, so --threads is applied before the imports below
+preload_thread_env(sys.argv[1:])
+
+import cv2
 import asyncio
 import signal
 import threading
@@ -10,6 +15,16 @@ from tkinter import Tk, Label, Button, StringVar
 from gesture_detection import GestureDetector
 from game_manager import GameManager
 from network_client import NetworkClient
+from landmark_recording import LandmarkRecorder
+from metrics import REGISTRY, start_metrics_server
+from decision_engine import SequentialDecision
+from capture import CaptureDevice
+from frame_buffers import FrameBuffers, mirror_frame
+from session_log import SessionRecorder
+from quality_governor import QualityGovernor
+from landmark_filter import OneEuroFilter
+from idle_scheduler import IdleScheduler
+from output_sink import OutputSink, draw_overlay
 import argparse
 import logging
 import time
@@ -26,23 +41,76 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+def keep_stdout_for_output():
+    """
+    Reserve stdout for the video stream written by '--output -'.
+
+    Log handlers writing to stdout are switched to stderr, and print() output
+    goes to stderr too, so nothing but frames reaches the pipe.
+    """
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, logging.StreamHandler) and handler.stream is sys.__stdout__:
+            handler.setStream(sys.stderr)
+    sys.stdout = sys.stderr
+
 class App:
     def __init__(self, args):
         self.args = args
+        # Before any thread is started, so the limits apply to all of them
+        if args.threads is not None or args.cpus:
+            apply_thread_limits(args.threads, parse_cpu_list(args.cpus) if args.cpus else None)
         self.exit_event = threading.Event()
         self.ui_queue = Queue()
         self.gesture_queue = Queue()  # Queue for gesture inputs
 
+        # Metrics
+        REGISTRY.gauge('app_ui_queue_depth', 'Messages waiting in ui_queue').set_function(self.ui_queue.qsize)
+        REGISTRY.gauge('app_gesture_queue_depth', 'Gestures waiting in gesture_queue').set_function(self.gesture_queue.qsize)
+        self.fps_gauge = REGISTRY.gauge('app_webcam_fps', 'Webcam loop frame rate')
+        self.empty_frames_counter = REGISTRY.counter('app_webcam_empty_frames', 'Empty frames returned by the camera')
+        self.submissions_counter = REGISTRY.counter('app_gesture_submissions', 'Gestures submitted to the server')
+        if args.metrics_port:
+            start_metrics_server(args.metrics_port)
+
         # Initialize GameManager and GestureDetector
         self.game_manager = GameManager(game_type=args.game_type, mode=args.mode)
-        self.gesture_detector = GestureDetector(mode=args.game_type)
+        if args.session_log:
+            self.game_manager.session_recorder = SessionRecorder(args.session_log)
+        self.gesture_detector = GestureDetector(max_buffer_len=args.vote_frames, mode=args.game_type)
+        if args.classifier_model:
+            self.gesture_detector.load_classifier_model(args.classifier_model)
+        if args.record:
+            self.gesture_detector.recorder = LandmarkRecorder(args.record)
+        if args.no_landmark_filter:
+            self.gesture_detector.landmark_filter = None
+        else:
+            self.gesture_detector.landmark_filter = OneEuroFilter(min_cutoff=args.filter_min_cutoff, beta=args.filter_beta)
+        if args.adaptive_quality:
+            self.gesture_detector.governor = QualityGovernor(target_fps=args.capture_fps, lag_budget=args.lag_budget)
+
+        # Drop to a low frame rate between prompts
+        if args.no_idle_scheduler:
+            self.idle_scheduler = None
+        else:
+            self.idle_scheduler = IdleScheduler(self.game_manager, idle_fps=args.idle_fps,
+                                                idle_inference_interval=args.idle_inference_interval,
+                                                wake_ahead=args.wake_ahead)
+        self.game_manager.idle_scheduler = self.idle_scheduler
 
         # Set the UI queue in GameManager
         self.game_manager.set_ui_queue(self.ui_queue)
+        # Let GameManager switch the detector's classifier on game type changes
+        self.game_manager.gesture_detector = self.gesture_detector
 
         # Initialize NetworkClient if in networked mode
         if self.game_manager.is_networked:
-            self.network_client = NetworkClient('http://localhost:5000', self.game_manager)
+            self.network_client = NetworkClient(
+                args.server_url, self.game_manager,
+                transports=args.transports.split(','),
+                compression=args.ws_compression,
+                debug_logging=args.socket_debug
+            )
             self.game_manager.network_client = self.network_client
         else:
             self.network_client = None
@@ -50,13 +118,15 @@ class App:
         # Setup signal handler for graceful exit
         signal.signal(signal.SIGINT, self.signal_handler)
 
-        # Use asyncio.new_event_loop() for networked mode to avoid DeprecationWarning
-        if self.game_manager.is_networked:
-            self.loop = asyncio.new_event_loop()
-            self.asyncio_thread = threading.Thread(target=self.start_asyncio_loop, daemon=True)
-            self.asyncio_thread.start()
-        else:
-            self.loop = asyncio.get_event_loop()
+        # Run the asyncio loop in its own thread; Tkinter owns the main thread in both modes
+        self.loop = asyncio.new_event_loop()
+        self.asyncio_thread = threading.Thread(target=self.start_asyncio_loop, daemon=True)
+        self.asyncio_thread.start()
+
+        # Sequential decision engine, re-created for every prompt with the current game type's bounds
+        self.decision_error_rate = args.decision_error_rate
+        self.decision_engine = None
+        self.decision_prompt_time = None
 
         # Start the webcam thread
         self.webcam_thread = threading.Thread(target=self.run_webcam, daemon=True)
@@ -80,6 +150,7 @@ class App:
         self.exit_event.set()
         if self.network_client:
             asyncio.run_coroutine_threadsafe(self.network_client.disconnect(), self.loop)
+        self.close_session_log()
         sys.exit(0)
 
     def start_asyncio_loop(self):
@@ -92,25 +163,52 @@ class App:
 
     def run_webcam(self):
         logger.info("App: Starting webcam feed...")
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
+        cap = CaptureDevice(
+            index=self.args.camera,
+            width=self.args.capture_width,
+            height=self.args.capture_height,
+            fps=self.args.capture_fps,
+            fourcc=self.args.capture_fourcc or None
+        )
+        if not cap.open():
             logger.error("App: Could not open webcam. Please check if it's connected and not used by another application.")
             self.exit_event.set()
             return
 
         logger.info("App: Webcam feed started successfully.")
+        frame_buffers = FrameBuffers()
+        output_sink = None
+        if self.args.output:
+            output_sink = OutputSink(self.args.output, self.args.capture_width, self.args.capture_height,
+                                     fps=self.args.output_fps, fmt=self.args.output_format).open()
+        fps_window_start = time.perf_counter()
+        fps_window_frames = 0
         try:
             while cap.isOpened() and not self.exit_event.is_set():
+                # Between prompts the scheduler slows the loop and samples inference
+                run_inference = self.idle_scheduler.wait() if self.idle_scheduler else True
                 success, frame = cap.read()
                 if not success:
                     logger.warning("App: Ignoring empty camera frame.")
+                    self.empty_frames_counter.inc()
                     continue
 
-                frame = cv2.flip(frame, 1)
-                frame = cv2.resize(frame, (640, 480))
+                # Frame rate over roughly one-second windows
+                fps_window_frames += 1
+                elapsed = time.perf_counter() - fps_window_start
+                if elapsed >= 1.0:
+                    self.fps_gauge.set(fps_window_frames / elapsed)
+                    fps_window_start += elapsed
+                    fps_window_frames = 0
+
+                # CaptureDevice already delivers the requested resolution
+                frame = mirror_frame(frame, frame_buffers)
 
                 # Process frame for gesture detection
-                annotated_frame = self.gesture_detector.process_frame(frame)
+                if run_inference:
+                    annotated_frame = self.gesture_detector.process_frame(frame, capture_time=cap.read_frame_time)
+                else:
+                    annotated_frame = frame
 
                 # Retrieve the current gesture and its confidence
                 gesture, confidence = self.gesture_detector.get_gesture()
@@ -118,21 +216,43 @@ class App:
                 # Log the detected gesture and confidence
                 logger.debug(f"App: Detected Gesture: {gesture}, Confidence: {confidence:.1f}")
 
-                # Determine if the gesture should be sent to the server
+                # Feed per-frame evidence to the decision engine and submit as soon as it commits
                 if self.game_manager.game_state == 'prompted' and not self.game_manager.response_sent:
-                    if gesture != 'None' and confidence >= 0.6:  # Adjust confidence threshold as needed
-                        logger.info(f"App: Preparing to submit gesture '{gesture}' to the server.")
+                    if self.decision_prompt_time != self.game_manager.prompt_time:
+                        self.reset_decision_engine()
+                    # Frames skipped by the quality governor or the idle scheduler carry no new evidence
+                    if run_inference and self.gesture_detector.frame_processed:
+                        frame_gesture, frame_probability = self.gesture_detector.get_frame_gesture()
+                        decision = self.decision_engine.update(
+                            frame_gesture, self.game_manager.time_since_prompt(), frame_probability)
+                    else:
+                        decision = None
+                    if decision:
+                        decided_gesture, decided_confidence = decision
+                        response_time = self.game_manager.time_since_prompt()
+                        logger.info(f"App: Committed gesture '{decided_gesture}' after {response_time:.2f}s (p={decided_confidence:.3f}).")
+                        self.game_manager.response_sent = True
                         asyncio.run_coroutine_threadsafe(
-                            self.network_client.submit_response(gesture, response_time=1, confidence_score=confidence),
-                            self.network_client.loop
+                            self.handle_final_gesture(decided_gesture, decided_confidence, response_time),
+                            self.loop
                         )
-                        self.game_manager.response_sent = True
-                        logger.info(f"App: Submitted gesture '{gesture}' to the server.")
+                        self.submissions_counter.inc()
                 else:
                     # Optionally, log when a gesture is ignored due to no active prompt
                     if gesture != 'None':
                         logger.debug(f"App: Ignored gesture '{gesture}' as no active prompt.")
 
+                # Annotate in place; the frame is a reused buffer overwritten by the next capture
+                game_manager = self.game_manager
+                draw_overlay(
+                    annotated_frame, gesture,
+                    prompt=game_manager.prompt if game_manager.game_state in ('armed', 'prompted') else None,
+                    result=game_manager.result_text if game_manager.game_state == 'responded' else None,
+                    score=game_manager.score
+                )
+                if output_sink:
+                    output_sink.submit(annotated_frame)
+
                 # Display the annotated frame
                 cv2.imshow('Game Window', annotated_frame)
 
@@ -146,11 +266,15 @@ class App:
 
         finally:
             cap.release()
+            if output_sink:
+                output_sink.close()
             try:
                 cv2.destroyAllWindows()
             except cv2.error as e:
                 logger.error(f"App: OpenCV cleanup error: {e}")
             self.gesture_detector.release()
+            if self.gesture_detector.recorder:
+                self.gesture_detector.recorder.close()
             logger.info("App: Webcam feed ended.")
 
     def process_gesture_buffer(self):
@@ -204,14 +328,22 @@ class App:
             self.loop
         )
 
-    async def handle_final_gesture(self, gesture):
+    def reset_decision_engine(self):
+        """
+        Start a fresh decision for the current prompt.
+        """
+        overrides = {'error_rate': self.decision_error_rate} if self.decision_error_rate else {}
+        self.decision_engine = SequentialDecision.for_game_type(self.game_manager.game_type, **overrides)
+        self.decision_prompt_time = self.game_manager.prompt_time
+
+    async def handle_final_gesture(self, gesture, confidence_score=1.0, response_time=None):
         """
         Handle the final gesture by sending it to the GameManager and server.
         """
         logger.debug(f"App: Handling final gesture: {gesture}")
-        # Assume a fixed response_time for simplicity
-        response_time = 1  # seconds
-        confidence_score = 1.0  # Since it's the median, assume high confidence
+        if response_time is None:
+            # Measured from the prompt start (server-synchronized in networked mode)
+            response_time = self.game_manager.time_since_prompt()
         response_accepted = await self.game_manager.receive_response(
             player_id=self.game_manager.player_id,
             user_gesture=gesture,
@@ -329,13 +461,60 @@ class App:
         self.exit_event.set()
         if self.network_client:
             asyncio.run_coroutine_threadsafe(self.network_client.disconnect(), self.loop)
+        self.close_session_log()
         self.root.destroy()
 
+    def close_session_log(self):
+        recorder = self.game_manager.session_recorder
+        if recorder:
+            self.game_manager.session_recorder = None
+            recorder.close()
+
 def main():
     parser = argparse.ArgumentParser(description="Run the game client.")
     parser.add_argument("mode", choices=["networked", "local"], help="Mode of the game")
     parser.add_argument("game_type", choices=["rps", "counting"], help="Type of the game")
+    parser.add_argument("--classifier-model", help="Learned landmark classifier (.npz) trained with landmark_classifier.py")
+    parser.add_argument("--vote-frames", type=int, default=5, help="Number of frames in the gesture vote window")
+    parser.add_argument("--record", help="Record per-frame landmarks and gestures to this .lmrec file")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics on this local port")
+    parser.add_argument("--camera", type=int, default=0, help="Camera index")
+    parser.add_argument("--capture-width", type=int, default=640, help="Requested capture width")
+    parser.add_argument("--capture-height", type=int, default=480, help="Requested capture height")
+    parser.add_argument("--capture-fps", type=int, default=30, help="Requested capture frame rate")
+    parser.add_argument("--capture-fourcc", default="MJPG", help="Requested pixel format; empty for the driver default")
+    parser.add_argument("--decision-error-rate", type=float, help="Target false-submission rate (overrides the game type default)")
+    parser.add_argument("--no-landmark-filter", action="store_true", help="Classify raw, unsmoothed landmarks")
+    parser.add_argument("--filter-min-cutoff", type=float, default=1.0,
+                        help="Landmark filter cutoff (Hz) for a still hand; lower smooths more")
+    parser.add_argument("--filter-beta", type=float, default=10.0,
+                        help="Landmark filter responsiveness to motion; higher lags less")
+    parser.add_argument("--adaptive-quality", action="store_true",
+                        help="Lower detection quality at runtime to hold the capture frame rate")
+    parser.add_argument("--lag-budget", type=float, default=0.1, help="Capture-to-result latency budget (s) for --adaptive-quality")
+    parser.add_argument("--no-idle-scheduler", action="store_true",
+                        help="Run inference at full rate between prompts too")
+    parser.add_argument("--idle-fps", type=float, default=5, help="Webcam loop rate between prompts")
+    parser.add_argument("--idle-inference-interval", type=float, default=1.0,
+                        help="Seconds between sampled inferences between prompts (0 pauses inference)")
+    parser.add_argument("--wake-ahead", type=float, default=0.5,
+                        help="Seconds before an expected prompt to return to full rate")
+    parser.add_argument("--threads", type=int,
+                        help="Cap OpenCV, OpenMP, BLAS and TFLite thread pools, e.g. 1 when hosting many clients per host")
+    parser.add_argument("--cpus", help="Pin the client to these CPUs, e.g. '2' or '0-3,6'")
+    parser.add_argument("--output", help="Write the annotated feed to this file or pipe ('-' for stdout)")
+    parser.add_argument("--output-format", choices=["y4m", "raw", "video"],
+                        help="Output format (default: from the --output extension, raw otherwise)")
+    parser.add_argument("--output-fps", type=int, default=30, help="Fixed output frame rate")
+    parser.add_argument("--server-url", default="http://localhost:5000", help="Game server URL")
+    parser.add_argument("--transports", default="polling,websocket",
+                        help="Comma-separated Socket.IO transports, e.g. 'websocket' to skip the long-polling handshake")
+    parser.add_argument("--ws-compression", action="store_true", help="Offer permessage-deflate on the websocket")
+    parser.add_argument("--socket-debug", action="store_true", help="Log every Socket.IO packet")
+    parser.add_argument("--session-log", help="Record prompts, responses and timeouts to this session log")
     args = parser.parse_args()
+    if args.output == '-':
+        keep_stdout_for_output()
 
     app = App(args)
 
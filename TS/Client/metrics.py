@@ -0,0 +1,226 @@
+# metrics.py
+
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+logger = logging.getLogger(__name__)
+
+# Default latency buckets in seconds, from sub-millisecond inference to multi-second rounds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def format_labels(labels):
+    """
+    :return: Prometheus label set such as '{room="r1"}', or '' for no labels
+    """
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{labels[key]}"' for key in sorted(labels)) + '}'
+
+
+class Counter:
+    """
+    Monotonically increasing value.
+
+    Updates are single attribute writes from the thread that owns the metric,
+    which keeps them cheap enough for the per-frame path.
+    """
+    kind = 'counter'
+
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def samples(self):
+        yield self.name + '_total', self.value
+
+
+class Gauge:
+    """
+    Value that can go up and down, or is sampled from callbacks at scrape time.
+
+    The registry hands every caller the same gauge for a name. Components that
+    can have several instances in one process pass labels to set_function, so
+    each instance is exported as its own sample instead of replacing the others.
+    """
+    kind = 'gauge'
+
+    def __init__(self, name, documentation, callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.value = 0
+        self.callbacks = {'': callback} if callback else {}  # Formatted labels -> callback
+        self.lock = threading.Lock()
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set_function(self, callback, **labels):
+        """
+        Sample the gauge from callback() whenever metrics are exported.
+
+        :param labels: Labels identifying the instance the callback reports on. A
+            callback already set for the same labels is replaced, with a warning,
+            since that instance stops being reported.
+        """
+        key = format_labels(labels)
+        with self.lock:
+            if key in self.callbacks:
+                logger.warning(f"Metrics: Gauge '{self.name}{key}' callback replaced; "
+                               f"only the latest instance is reported.")
+            self.callbacks[key] = callback
+
+    def remove_function(self, **labels):
+        """
+        Stop sampling the callback set for these labels.
+        """
+        with self.lock:
+            self.callbacks.pop(format_labels(labels), None)
+
+    def samples(self):
+        with self.lock:
+            callbacks = list(self.callbacks.items())
+        if not callbacks:
+            yield self.name, self.value
+        for key, callback in callbacks:
+            value = self.value
+            try:
+                value = callback()
+            except Exception as e:
+                logger.debug(f"Metrics: Gauge '{self.name}{key}' callback failed: {e}")
+            yield self.name + key, value
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram in the Prometheus style.
+    """
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            self.counts[index] += 1
+            self.sum += value
+
+    def samples(self):
+        with self.lock:
+            counts = list(self.counts)
+            total = self.sum
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            cumulative += count
+            yield f'{self.name}_bucket{{le="{format_value(bound)}"}}', cumulative
+        yield self.name + '_sum', total
+        yield self.name + '_count', cumulative
+
+
+class MetricsRegistry:
+    """
+    Collection of named metrics exported in Prometheus text format.
+
+    Metrics are created once (get-or-create by name) and then updated directly,
+    so hot paths hold a reference instead of looking metrics up per update.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def get_or_create(self, metric_cls, name, documentation, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = metric_cls(name, documentation, **kwargs)
+                self.metrics[name] = metric
+            elif not isinstance(metric, metric_cls):
+                raise ValueError(f"Metric '{name}' already registered as a {metric.kind}")
+            return metric
+
+    def counter(self, name, documentation):
+        return self.get_or_create(Counter, name, documentation)
+
+    def gauge(self, name, documentation, callback=None):
+        return self.get_or_create(Gauge, name, documentation, callback=callback)
+
+    def histogram(self, name, documentation, buckets=DEFAULT_BUCKETS):
+        return self.get_or_create(Histogram, name, documentation, buckets=buckets)
+
+    def export(self):
+        """
+        Render all metrics in the Prometheus text exposition format.
+        """
+        with self.lock:
+            metrics = list(self.metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for sample_name, value in metric.samples():
+                lines.append(f'{sample_name} {format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+# Process-wide registry used by the client components
+REGISTRY = MetricsRegistry()
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?')[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.registry.export().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug(f"Metrics: {self.address_string()} {format % args}")
+
+
+def start_metrics_server(port, host='127.0.0.1', registry=REGISTRY):
+    """
+    Serve the registry at http://host:port/metrics from a daemon thread.
+
+    :param port: TCP port to listen on
+    :param host: Interface to bind; defaults to localhost only
+    :param registry: MetricsRegistry to export
+    :return: The running ThreadingHTTPServer
+    """
+    handler = type('BoundMetricsRequestHandler', (MetricsRequestHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+    logger.info(f"Metrics: Serving Prometheus metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
@@ -4,23 +4,61 @@ import socketio
 import asyncio
 import uuid
 import logging
+import time
+
+from clock_sync import ClockSync
+from state_sync import StateSync
+from metrics import REGISTRY
 
 logger = logging.getLogger(__name__)
 
 class NetworkClient:
-    def __init__(self, server_url, game_manager):
+    def __init__(self, server_url, game_manager, transports=('polling', 'websocket'), compression=False, debug_logging=False):
         """
         Initialize the NetworkClient.
 
         :param server_url: URL of the game server
         :param game_manager: Instance of GameManager to communicate with
+        :param transports: Allowed transports in order of preference. The default starts with
+            HTTP long-polling and upgrades to websocket, as before; ('websocket',) skips the
+            polling handshake. Compare them with bench_transport.py before changing the default.
+        :param compression: Offer permessage-deflate on the websocket (only used if the
+            server enables it, see SOCKET_PER_MESSAGE_DEFLATE in server.js)
+        :param debug_logging: Log every Socket.IO/Engine.IO packet
         """
         self.server_url = server_url
         self.game_manager = game_manager
-        self.sio = socketio.AsyncClient(logger=True, engineio_logger=True)
+        self.transports = list(transports)
+        self.sio = socketio.AsyncClient(
+            logger=debug_logging,
+            engineio_logger=debug_logging,
+            websocket_extra_options={'compress': 15} if compression else None
+        )
         self.player_id = str(uuid.uuid4())
         self.connected = False
 
+        # Server clock offset estimation
+        self.clock_sync = ClockSync()
+        self.clock_sync_interval = 30  # seconds between re-synchronizations
+        self.clock_sync_task = None
+
+        # Replica of the server score table, kept current with versioned deltas
+        self.state_sync = StateSync()
+        self.resync_task = None
+
+        # Metrics
+        self.connects_counter = REGISTRY.counter('network_connects', 'Successful connections to the server')
+        self.reconnects_counter = REGISTRY.counter('network_reconnects', 'Connections after the first one')
+        self.disconnects_counter = REGISTRY.counter('network_disconnects', 'Disconnections from the server')
+        self.connect_failures_counter = REGISTRY.counter('network_connect_failures', 'Failed connection attempts')
+        self.prompts_counter = REGISTRY.counter('network_prompts_received', 'Prompts received from the server')
+        self.submit_errors_counter = REGISTRY.counter('network_submit_errors', 'Responses that failed to send')
+        self.submit_rtt_histogram = REGISTRY.histogram('network_submit_rtt_seconds', 'Response submit round trip until server ack')
+        self.state_resyncs_counter = REGISTRY.counter('network_state_resyncs', 'Full state resyncs after a delta version gap')
+        REGISTRY.gauge('network_connected', 'Whether the client is connected').set_function(lambda: int(self.connected))
+        REGISTRY.gauge('network_state_version', 'Version of the synced server state').set_function(
+            lambda: self.state_sync.version or 0)
+
         # Bind event handlers
         self.sio.on('connect', self.on_connect)
         self.sio.on('disconnect', self.on_disconnect)
@@ -28,17 +66,21 @@ class NetworkClient:
         self.sio.on('prompt', self.on_prompt)
         self.sio.on('result', self.on_result)
         self.sio.on('player_scores', self.on_player_scores)
+        self.sio.on('state_snapshot', self.on_state_snapshot)
+        self.sio.on('state_delta', self.on_state_delta)
+        self.sio.on('round_result', self.on_round_result)
         self.sio.on('reset', self.on_reset)
         self.sio.on('game_type_changed', self.on_game_type_changed)
 
     async def connect(self):
         try:
-            await self.sio.connect(self.server_url)
+            await self.sio.connect(self.server_url, transports=self.transports)
             self.connected = True
             logger.info("NetworkClient: Connected to the server.")
             await self.sio.wait()
         except socketio.exceptions.ConnectionError as e:
             logger.error(f"NetworkClient: Connection failed: {e}")
+            self.connect_failures_counter.inc()
             self.game_manager.send_ui_message("Failed", "Connection to server failed.")
 
     async def disconnect(self):
@@ -50,8 +92,14 @@ class NetworkClient:
 
     async def on_connect(self):
         logger.info("NetworkClient: Successfully connected to the server.")
-        # Emit 'join' event with player_id
-        await self.sio.emit('join', {'player_id': self.player_id})
+        self.connected = True
+        if self.connects_counter.value:
+            self.reconnects_counter.inc()
+        self.connects_counter.inc()
+        # Emit 'join' event with player_id; state_sync asks for snapshots and deltas
+        # instead of full score tables
+        self.state_sync = StateSync()
+        await self.sio.emit('join', {'player_id': self.player_id, 'state_sync': True})
         logger.info(f"NetworkClient: Emitted 'join' event with Player ID: {self.player_id}")
         
         # Set player_id in GameManager
@@ -59,9 +107,16 @@ class NetworkClient:
         
         self.game_manager.send_ui_message("Connected", "Connected to server.")
 
+        if self.clock_sync_task is None or self.clock_sync_task.done():
+            self.clock_sync_task = asyncio.create_task(self.clock_sync_loop())
+
     async def on_disconnect(self):
         logger.info("NetworkClient: Disconnected from the server.")
         self.connected = False
+        if self.clock_sync_task:
+            self.clock_sync_task.cancel()
+            self.clock_sync_task = None
+        self.disconnects_counter.inc()
         self.game_manager.send_ui_message("Disconnected", "Disconnected from server.")
 
     async def on_error(self, data):
@@ -73,6 +128,7 @@ class NetworkClient:
         Handle incoming 'prompt' event from the server.
         """
         logger.info(f"NetworkClient: Received prompt: {data}")
+        self.prompts_counter.inc()
         await self.game_manager.receive_prompt(data)
         prompt_text = data.get('prompt', 'No Prompt')
         self.game_manager.send_ui_message("prompt", prompt_text)
@@ -95,6 +151,54 @@ class NetworkClient:
         scores_text = "Scores updated."
         self.game_manager.send_ui_message("score", scores_text)
 
+    async def on_state_snapshot(self, data):
+        """
+        Handle the full 'state_snapshot' sent on join.
+        """
+        changed = self.state_sync.apply_snapshot(data)
+        self.publish_state(changed)
+
+    async def on_state_delta(self, data):
+        """
+        Handle an incremental 'state_delta'; request a snapshot on a version gap.
+        """
+        changed = self.state_sync.apply_delta(data)
+        self.publish_state(changed)
+
+    async def on_round_result(self, data):
+        """
+        Handle this player's 'round_result'.
+        """
+        self.publish_state(self.state_sync.apply_result(self.player_id, data))
+
+    def publish_state(self, changed):
+        if changed is None:
+            if self.resync_task is None or self.resync_task.done():
+                self.resync_task = asyncio.create_task(self.resync_state())
+        elif changed:
+            self.game_manager.on_state_synced(self.state_sync, changed)
+
+    async def resync_state(self):
+        """
+        Fetch a full snapshot after missing one or more deltas.
+
+        Deltas buffered meanwhile are replayed on the snapshot; if they skip a
+        version too, another snapshot is fetched.
+        """
+        while True:
+            self.state_resyncs_counter.inc()
+            try:
+                snapshot = await self.sio.call('state_resync', {}, timeout=5)
+            except socketio.exceptions.TimeoutError:
+                logger.warning("NetworkClient: State resync timed out; waiting for the next delta.")
+                self.state_sync.resyncing = False
+                return
+            changed = self.state_sync.apply_snapshot(snapshot)
+            if changed is not None:
+                self.publish_state(changed)
+                return
+            logger.info("NetworkClient: Buffered deltas skip a version; requesting another snapshot.")
+
     async def on_reset(self, data):
         """
         Handle incoming 'reset' event from the server.
@@ -112,18 +216,44 @@ class NetworkClient:
         await self.game_manager.change_game_type(new_game_type)
         self.game_manager.send_ui_message("prompt", f"Game type changed to '{new_game_type}'.")
 
+    async def sync_clock(self, samples=8):
+        """
+        Estimate the server clock offset with a burst of 'time_sync' round trips.
+
+        :param samples: Number of request/reply exchanges
+        """
+        for _ in range(samples):
+            t0 = time.time()
+            try:
+                reply = await self.sio.call('time_sync', {'t0': t0}, timeout=2)
+            except socketio.exceptions.TimeoutError:
+                logger.warning("NetworkClient: Server did not answer 'time_sync'; prompts will start on arrival.")
+                return
+            self.clock_sync.add_sample(t0, reply['server_time'] / 1000, time.time())
+        logger.info(f"NetworkClient: Clock offset {self.clock_sync.offset * 1000:.1f}ms (rtt {self.clock_sync.rtt * 1000:.1f}ms).")
+
+    async def clock_sync_loop(self):
+        """
+        Keep the clock offset fresh while connected.
+        """
+        while self.connected:
+            await self.sync_clock()
+            await asyncio.sleep(self.clock_sync_interval)
+
     async def submit_response(self, gesture, response_time, confidence_score):
         """
         Submit the player's response to the server.
         """
         try:
+            sent_at = time.perf_counter()
             await self.sio.emit('response', {
                 'player_id': self.player_id,
                 'gesture': gesture,
                 'response_time': response_time,
                 'confidence_score': confidence_score
-            })
+            }, callback=lambda *ack: self.submit_rtt_histogram.observe(time.perf_counter() - sent_at))
             logger.info(f"NetworkClient: Submitted response: Gesture={gesture}, Time={response_time}s, Confidence={confidence_score}")
         except Exception as e:
             logger.error(f"NetworkClient: Error in submit_response: {e}")
+            self.submit_errors_counter.inc()
             self.game_manager.send_ui_message("Error", "Failed to submit response.")
@@ -0,0 +1,203 @@
+# output_sink.py
+
+import logging
+import os
+import sys
+import threading
+import time
+from collections import deque
+
+import cv2
+import numpy as np
+
+from frame_buffers import FrameBuffers
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ('y4m', 'raw', 'video')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov')
+
+
+def draw_overlay(frame, gesture, prompt=None, result=None, score=None):
+    """
+    Draw the gesture and game state onto a frame in place.
+
+    :param frame: BGR frame to annotate
+    :param gesture: Current gesture label
+    :param prompt: Active prompt text, if any
+    :param result: Last round result, if any
+    :param score: Total score, if any
+    :return: The same frame
+    """
+    lines = [f"Gesture: {gesture}"]
+    if prompt is not None:
+        lines.append(f"Prompt: {prompt}")
+    if result:
+        lines.append(result)
+    if score is not None:
+        lines.append(f"Score: {score:.1f}")
+    for i, text in enumerate(lines):
+        origin = (12, 32 + 30 * i)
+        cv2.putText(frame, text, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 4, cv2.LINE_AA)
+        cv2.putText(frame, text, origin, cv2.FONT_HERSHEY_SIMPLEX, 0.8, (255, 255, 255), 2, cv2.LINE_AA)
+    return frame
+
+
+class OutputSink:
+    """
+    Paced writer of annotated frames for virtual cameras and recorders.
+
+    Supported formats:
+      'y4m':   YUV4MPEG2 (I420) stream, readable by ffmpeg and v4l2loopback feeders
+      'raw':   headerless BGR24 frames, e.g. for `ffmpeg -f rawvideo -pix_fmt bgr24`
+      'video': a video file through cv2.VideoWriter
+
+    submit() converts the frame straight into a preallocated slot (the only copy)
+    and queues it. A writer thread emits exactly one frame per output tick: the
+    oldest queued frame, or the previous one again if none arrived in time.
+    When the consumer is slow the queue drops its oldest frame instead of
+    blocking the detection loop.
+    """
+
+    def __init__(self, target, width, height, fps=30, fmt=None, queue_size=2):
+        """
+        :param target: Output path, named pipe, or '-' for stdout
+        :param width: Output frame width
+        :param height: Output frame height
+        :param fps: Output frame rate
+        :param fmt: One of FORMATS; inferred from the target's extension if omitted
+        :param queue_size: Frames buffered before the oldest is dropped
+        """
+        if fmt is None:
+            extension = os.path.splitext(target)[1].lower()
+            fmt = 'y4m' if extension == '.y4m' else 'video' if extension in VIDEO_EXTENSIONS else 'raw'
+        if fmt not in FORMATS:
+            raise ValueError(f"Unsupported output format '{fmt}'")
+        if fmt == 'y4m' and (width % 2 or height % 2):
+            raise ValueError("Y4M output needs an even width and height")
+        self.target = target
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fmt = fmt
+
+        if fmt == 'y4m':
+            slot_shape = (height * 3 // 2, width)
+        else:
+            slot_shape = (height, width, 3)
+        # Queue, plus the frame held for repeats, plus one being filled
+        self.free_slots = [np.empty(slot_shape, dtype=np.uint8) for _ in range(queue_size + 2)]
+        self.queue = deque()
+        self.queue_size = queue_size
+        self.lock = threading.Condition()
+        self.resize_buffers = FrameBuffers()  # Used only if submitted frames have another size
+
+        self.writer = None
+        self.stream = None
+        self.running = False
+        self.thread = None
+
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.written_counter = REGISTRY.counter('output_frames_written', 'Frames written to the output sink')
+        self.dropped_counter = REGISTRY.counter('output_frames_dropped', 'Frames dropped because the output consumer was slow')
+        self.repeated_counter = REGISTRY.counter('output_frames_repeated', 'Output ticks that repeated the previous frame')
+        REGISTRY.gauge('output_queue_depth', 'Frames waiting for the output sink').set_function(lambda: len(self.queue))
+
+    def open(self):
+        if self.fmt == 'video':
+            fourcc = 'mp4v' if self.target.lower().endswith('.mp4') else 'MJPG'
+            self.writer = cv2.VideoWriter(self.target, cv2.VideoWriter_fourcc(*fourcc), self.fps,
+                                          (self.width, self.height))
+            if not self.writer.isOpened():
+                raise IOError(f"Cannot open video writer for {self.target}")
+        else:
+            # The process's real stdout: main.py points sys.stdout at stderr when streaming to '-'
+            self.stream = sys.__stdout__.buffer if self.target == '-' else open(self.target, 'wb')
+            if self.fmt == 'y4m':
+                self.stream.write(f"YUV4MPEG2 W{self.width} H{self.height} F{self.fps}:1 Ip A1:1 C420jpeg\n".encode())
+        self.running = True
+        self.thread = threading.Thread(target=self.write_loop, name='output-sink', daemon=True)
+        self.thread.start()
+        logger.info(f"OutputSink: Writing {self.width}x{self.height}@{self.fps} {self.fmt} to {self.target}.")
+        return self
+
+    def submit(self, frame):
+        """
+        Queue a BGR frame for output. Never blocks on the consumer.
+
+        :param frame: BGR frame; it is copied, so the caller may reuse its buffer
+        """
+        with self.lock:
+            if len(self.queue) >= self.queue_size:
+                self.free_slots.append(self.queue.popleft())
+                self.frames_dropped += 1
+                self.dropped_counter.inc()
+            slot = self.free_slots.pop()
+
+        if frame.shape[:2] != (self.height, self.width):
+            frame = cv2.resize(frame, (self.width, self.height),
+                               dst=self.resize_buffers.get('output', (self.height, self.width, 3)))
+        if self.fmt == 'y4m':
+            cv2.cvtColor(frame, cv2.COLOR_BGR2YUV_I420, dst=slot)
+        else:
+            np.copyto(slot, frame)
+
+        with self.lock:
+            self.queue.append(slot)
+            self.lock.notify()
+
+    def write_loop(self):
+        interval = 1.0 / self.fps
+        current = None
+        # Wait for the first frame before starting the clock
+        with self.lock:
+            self.lock.wait_for(lambda: self.queue or not self.running)
+        next_tick = time.perf_counter()
+        while self.running:
+            with self.lock:
+                if self.queue:
+                    if current is not None:
+                        self.free_slots.append(current)
+                    current = self.queue.popleft()
+                elif current is not None:
+                    self.repeated_counter.inc()
+            if current is not None:
+                try:
+                    self.write(current)
+                except (BrokenPipeError, OSError) as e:
+                    logger.error(f"OutputSink: Output closed: {e}")
+                    self.running = False
+                    break
+                self.frames_written += 1
+                self.written_counter.inc()
+
+            next_tick += interval
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # The consumer fell behind by more than a tick: restart pacing from now
+                next_tick = time.perf_counter()
+
+    def write(self, slot):
+        if self.fmt == 'video':
+            self.writer.write(slot)
+            return
+        if self.fmt == 'y4m':
+            self.stream.write(b"FRAME\n")
+        self.stream.write(memoryview(slot).cast('B'))
+        self.stream.flush()
+
+    def close(self):
+        self.running = False
+        with self.lock:
+            self.lock.notify_all()
+        if self.thread:
+            self.thread.join(timeout=1.0)
+        if self.writer is not None:
+            self.writer.release()
+        if self.stream is not None and self.stream is not sys.__stdout__.buffer:
+            self.stream.close()
+        logger.info(f"OutputSink: Closed. Wrote {self.frames_written} frames, dropped {self.frames_dropped}.")
@@ -0,0 +1,123 @@
+# quality_governor.py
+
+import logging
+import os
+import time
+
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+# Quality levels from best to cheapest. Each step gives up the lever with the
+# least effect on accuracy first:
+#   scale:            inference resolution relative to the capture frame
+#   model_complexity: MediaPipe Hands model (1 = full, 0 = lite)
+#   blur:             Gaussian blur before inference
+#   frame_skip:       frames skipped between inferences (the last result is kept)
+QUALITY_LEVELS = (
+    {'scale': 1.0, 'model_complexity': 1, 'blur': True, 'frame_skip': 0},
+    {'scale': 1.0, 'model_complexity': 1, 'blur': False, 'frame_skip': 0},
+    {'scale': 1.0, 'model_complexity': 0, 'blur': False, 'frame_skip': 0},
+    {'scale': 0.75, 'model_complexity': 0, 'blur': False, 'frame_skip': 0},
+    {'scale': 0.5, 'model_complexity': 0, 'blur': False, 'frame_skip': 0},
+    {'scale': 0.5, 'model_complexity': 0, 'blur': False, 'frame_skip': 1},
+    {'scale': 0.5, 'model_complexity': 0, 'blur': False, 'frame_skip': 2},
+)
+
+
+class QualityGovernor:
+    """
+    Closed-loop controller that trades detection quality for frame rate.
+
+    Frame time, frame lag (capture to end of processing) and process CPU usage
+    are smoothed with an EWMA and compared against their budgets. The largest
+    ratio is the load: above 1 the governor steps quality down, below
+    `headroom` it steps quality back up. The band between the two thresholds,
+    plus separate cooldowns for each direction, keeps it from oscillating;
+    stepping up waits longer because it is only an optimization.
+    """
+
+    def __init__(self, target_fps=30, lag_budget=0.1, cpu_budget=0.9, alpha=0.1, headroom=0.6,
+                 down_cooldown=1.0, up_cooldown=5.0, level=0, clock=time.monotonic):
+        """
+        :param target_fps: Frame rate to hold; sets the per-frame time budget
+        :param lag_budget: Maximum seconds from capture to end of processing
+        :param cpu_budget: Maximum fraction of all cores used by this process
+        :param alpha: EWMA smoothing factor per frame
+        :param headroom: Load below which quality is stepped back up
+        :param down_cooldown: Seconds after a change before quality may drop again
+        :param up_cooldown: Seconds after a change before quality may rise again
+        :param level: Initial index into QUALITY_LEVELS
+        :param clock: Callable returning the current time in seconds
+        """
+        self.frame_budget = 1.0 / target_fps
+        self.lag_budget = lag_budget
+        self.cpu_budget = cpu_budget
+        self.alpha = alpha
+        self.headroom = headroom
+        self.down_cooldown = down_cooldown
+        self.up_cooldown = up_cooldown
+        self.clock = clock
+        self.level = level
+        self.last_change = clock()
+
+        self.frame_time = 0.0
+        self.lag = 0.0
+        self.cpu = 0.0
+        self.cpu_count = os.cpu_count() or 1
+        self.cpu_sample = (time.process_time(), time.perf_counter())
+
+        self.level_gauge = REGISTRY.gauge('quality_level', 'Quality level index (0 = best)')
+        self.load_gauge = REGISTRY.gauge('quality_load', 'Smoothed load relative to budget')
+        self.changes_counter = REGISTRY.counter('quality_level_changes', 'Quality level changes')
+        self.level_gauge.set(level)
+
+    @property
+    def settings(self):
+        return QUALITY_LEVELS[self.level]
+
+    def sample_cpu(self):
+        """
+        Process CPU usage as a fraction of all cores since the last sample.
+        """
+        cpu_time, wall_time = time.process_time(), time.perf_counter()
+        last_cpu, last_wall = self.cpu_sample
+        self.cpu_sample = (cpu_time, wall_time)
+        if wall_time <= last_wall:
+            return self.cpu
+        return (cpu_time - last_cpu) / (wall_time - last_wall) / self.cpu_count
+
+    def load(self):
+        return max(self.frame_time / self.frame_budget, self.lag / self.lag_budget, self.cpu / self.cpu_budget)
+
+    def observe(self, frame_time, lag=0.0):
+        """
+        Record one frame and step the quality level if needed.
+
+        :param frame_time: Seconds spent processing the frame (including skipped frames)
+        :param lag: Seconds from capture to the end of processing
+        :return: The new settings dict if the level changed, else None
+        """
+        a = self.alpha
+        self.frame_time += a * (frame_time - self.frame_time)
+        self.lag += a * (lag - self.lag)
+        self.cpu += a * (self.sample_cpu() - self.cpu)
+
+        load = self.load()
+        self.load_gauge.set(load)
+        since_change = self.clock() - self.last_change
+        if load > 1 and self.level < len(QUALITY_LEVELS) - 1 and since_change >= self.down_cooldown:
+            return self.set_level(self.level + 1, load)
+        if load < self.headroom and self.level > 0 and since_change >= self.up_cooldown:
+            return self.set_level(self.level - 1, load)
+        return None
+
+    def set_level(self, level, load=None):
+        direction = 'down' if level > self.level else 'up'
+        self.level = level
+        self.last_change = self.clock()
+        self.level_gauge.set(level)
+        self.changes_counter.inc()
+        load_text = f" (load {load:.2f})" if load is not None else ""
+        logger.info(f"QualityGovernor: Quality stepped {direction} to level {level}{load_text}: {self.settings}")
+        return self.settings
@@ -4,6 +4,17 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Gesture -> the gesture it beats
+BEATS = {'Rock': 'Scissors', 'Paper': 'Rock', 'Scissors': 'Paper'}
+WIN_OUTCOME = 'You Win!'
+
+
+def winning_gesture(prompt):
+    """
+    The gesture that beats the prompted one, i.e. the correct answer to an RPS prompt.
+    """
+    return next(gesture for gesture, beaten in BEATS.items() if beaten == prompt)
+
 class RockPaperScissorsGame:
     def __init__(self, game_manager):
         self.game_manager = game_manager
@@ -11,10 +22,8 @@ class RockPaperScissorsGame:
     def determine_winner(self, player_gesture, system_gesture):
         if player_gesture == system_gesture:
             return 'Tie'
-        elif (player_gesture == 'Rock' and system_gesture == 'Scissors') or \
-             (player_gesture == 'Paper' and system_gesture == 'Rock') or \
-             (player_gesture == 'Scissors' and system_gesture == 'Paper'):
-            return 'You Win!'
+        elif BEATS.get(player_gesture) == system_gesture:
+            return WIN_OUTCOME
         else:
             return 'You Lose!'
 
@@ -0,0 +1,310 @@
+# session_log.py
+
+import argparse
+import asyncio
+import json
+import logging
+import struct
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from game_manager import CORRECT_OUTCOMES
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'TSSLOG1\x00'
+BLOCK_MAGIC = b'BLK0'
+BLOCK_HEADER = struct.Struct('<4sII')  # magic, JSON header length, payload length
+
+# Record kinds
+PROMPT = 0
+RESPONSE = 1
+TIMEOUT = 2
+
+# Column name -> dtype. String columns are dictionary-encoded as uint32 codes.
+COLUMNS = {
+    'timestamp': '<f8',
+    'kind': 'u1',
+    'round': '<i4',
+    'player': '<u4',
+    'prompt': '<u4',
+    'gesture': '<u4',
+    'outcome': '<u4',
+    'correct': 'i1',          # -1 for non-response records
+    'response_time': '<f4',   # Seconds from prompt start, NaN if not applicable
+    'confidence': '<f4',
+    'round_score': '<f4',
+    'total_score': '<f4',
+}
+STRING_COLUMNS = ('player', 'prompt', 'gesture', 'outcome')
+
+# Response-time histogram used for streaming percentiles: 1 ms bins up to 60 s
+HISTOGRAM_BIN = 0.001
+HISTOGRAM_BINS = 60000
+
+
+class SessionRecorder:
+    """
+    Append-only recorder of game session events.
+
+    Records are appended to an in-memory list on the event loop and written in
+    batches as columnar blocks by a single background thread, so the game loop
+    never blocks on file I/O. Buffered records are also written every
+    `flush_interval` seconds, so a crash loses at most that much of the session.
+    All methods are thread-safe; close() may be called from any thread.
+    """
+
+    def __init__(self, path, flush_rows=4096, flush_interval=1.0):
+        """
+        :param path: Output file path
+        :param flush_rows: Buffered records that trigger a background flush
+        :param flush_interval: Seconds (wall clock) after which buffered records are written anyway
+        """
+        self.path = path
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.rows = []
+        self.lock = threading.Lock()  # Guards rows and closed
+        self.closed = False
+        self.string_codes = {}  # Shared by all string columns
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='session-log')
+        self.pending = None
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.records_written = 0
+        self.stop_event = threading.Event()
+        self.flush_thread = threading.Thread(target=self.flush_loop, name='session-log-flush', daemon=True)
+        self.flush_thread.start()
+        logger.info(f"SessionRecorder: Recording session events to {path}")
+
+    def append(self, kind, round_number, player='', prompt='', gesture='', outcome='',
+               response_time=float('nan'), confidence=float('nan'), round_score=float('nan'),
+               total_score=float('nan')):
+        correct = (1 if outcome in CORRECT_OUTCOMES else 0) if kind == RESPONSE else -1
+        row = (time.time(), kind, round_number, str(player), str(prompt), str(gesture),
+               str(outcome), correct, response_time, confidence, round_score, total_score)
+        with self.lock:
+            if self.closed:
+                return
+            self.rows.append(row)
+            full = len(self.rows) >= self.flush_rows
+        if full:
+            self.flush()
+
+    def record_prompt(self, round_number, prompt, player=''):
+        self.append(PROMPT, round_number, player=player, prompt=prompt)
+
+    def record_response(self, round_number, player, prompt, gesture, outcome, response_time,
+                        confidence, round_score, total_score):
+        self.append(RESPONSE, round_number, player=player, prompt=prompt, gesture=gesture, outcome=outcome,
+                    response_time=response_time, confidence=confidence, round_score=round_score,
+                    total_score=total_score)
+
+    def record_timeout(self, round_number, player, prompt, total_score):
+        self.append(TIMEOUT, round_number, player=player, prompt=prompt, total_score=total_score)
+
+    def flush(self):
+        """
+        Hand the buffered records to the writer thread.
+
+        :return: concurrent.futures.Future for the write
+        """
+        with self.lock:
+            rows, self.rows = self.rows, []
+            if rows and not self.closed:
+                self.pending = self.executor.submit(self.write_block, rows)
+            return self.pending
+
+    def flush_loop(self):
+        while not self.stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def write_block(self, rows):
+        columns = list(zip(*rows))
+        new_strings = []
+        arrays = []
+        for (name, dtype), values in zip(COLUMNS.items(), columns):
+            if name in STRING_COLUMNS:
+                codes = []
+                for value in values:
+                    code = self.string_codes.get(value)
+                    if code is None:
+                        code = self.string_codes[value] = len(self.string_codes)
+                        new_strings.append(value)
+                    codes.append(code)
+                values = codes
+            arrays.append(np.asarray(values, dtype=dtype))
+
+        header = json.dumps({
+            'rows': len(rows),
+            'columns': [[name, dtype, array.nbytes] for (name, dtype), array in zip(COLUMNS.items(), arrays)],
+            'strings': new_strings,
+        }).encode('utf-8')
+        payload_len = sum(array.nbytes for array in arrays)
+        self.file.write(BLOCK_HEADER.pack(BLOCK_MAGIC, len(header), payload_len))
+        self.file.write(header)
+        for array in arrays:
+            self.file.write(array.tobytes())
+        self.file.flush()
+        self.records_written += len(rows)
+
+    async def aclose(self):
+        """
+        Flush remaining records without blocking the event loop, then close.
+        """
+        future = self.flush()
+        if future:
+            await asyncio.wrap_future(future)
+        self.close()
+
+    def close(self):
+        self.stop_event.set()
+        with self.lock:
+            if self.closed:
+                return
+            self.closed = True
+            rows, self.rows = self.rows, []
+            if rows:
+                self.executor.submit(self.write_block, rows)
+        # Waits for every queued block
+        self.executor.shutdown(wait=True)
+        self.file.close()
+        logger.info(f"SessionRecorder: Wrote {self.records_written} records to {self.path}")
+
+
+class SessionLog:
+    """
+    Streaming reader and analytics over a session log.
+
+    Only the requested columns are read, one block at a time, so memory use is
+    bounded by the block size rather than the number of rounds.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a session log")
+
+    def blocks(self, columns):
+        """
+        Yield (strings, arrays) per block, where arrays maps each requested column to its
+        values and strings is the string dictionary known so far.
+        """
+        strings = []
+        with open(self.path, 'rb') as f:
+            f.seek(len(MAGIC))
+            while True:
+                raw = f.read(BLOCK_HEADER.size)
+                if len(raw) < BLOCK_HEADER.size:
+                    return
+                magic, header_len, payload_len = BLOCK_HEADER.unpack(raw)
+                if magic != BLOCK_MAGIC:
+                    raise ValueError(f"Corrupt block in {self.path}")
+                header = json.loads(f.read(header_len))
+                strings.extend(header['strings'])
+                payload_start = f.tell()
+                arrays = {}
+                offset = 0
+                for name, dtype, nbytes in header['columns']:
+                    if name in columns:
+                        f.seek(payload_start + offset)
+                        arrays[name] = np.fromfile(f, dtype=dtype, count=header['rows'])
+                    offset += nbytes
+                f.seek(payload_start + payload_len)
+                yield strings, arrays
+
+    def player_stats(self):
+        """
+        Per-player response, accuracy and timeout statistics.
+
+        :return: Dict player -> {'responses', 'correct', 'timeouts', 'accuracy', 'timeout_rate', 'score'}
+        """
+        totals = defaultdict(lambda: np.zeros(4))  # responses, correct, timeouts, score
+        strings = []
+        for strings, block in self.blocks(('kind', 'player', 'correct', 'round_score')):
+            kind, player = block['kind'], block['player']
+            size = len(strings)
+            responses = np.bincount(player[kind == RESPONSE], minlength=size)
+            correct = np.bincount(player[(kind == RESPONSE) & (block['correct'] == 1)], minlength=size)
+            timeouts = np.bincount(player[kind == TIMEOUT], minlength=size)
+            scores = np.bincount(player[kind == RESPONSE], weights=block['round_score'][kind == RESPONSE], minlength=size)
+            for code in np.nonzero(responses + timeouts)[0]:
+                totals[code] += (responses[code], correct[code], timeouts[code], scores[code])
+
+        stats = {}
+        for code, (responses, correct, timeouts, score) in totals.items():
+            stats[strings[code]] = {
+                'responses': int(responses),
+                'correct': int(correct),
+                'timeouts': int(timeouts),
+                'accuracy': correct / responses if responses else 0.0,
+                'timeout_rate': timeouts / (responses + timeouts),
+                'score': score,
+            }
+        return stats
+
+    def response_time_percentiles(self, percentiles=(50, 90, 99), player=None):
+        """
+        Response-time percentiles from a streaming 1 ms histogram.
+
+        :param percentiles: Percentiles to compute (0-100)
+        :param player: Restrict to one player ID
+        :return: Dict percentile -> seconds
+        """
+        histogram = np.zeros(HISTOGRAM_BINS + 1, dtype=np.int64)
+        for strings, block in self.blocks(('kind', 'player', 'response_time')):
+            mask = block['kind'] == RESPONSE
+            if player is not None:
+                if player not in strings:
+                    continue
+                mask &= block['player'] == strings.index(player)
+            bins = np.minimum((block['response_time'][mask] / HISTOGRAM_BIN).astype(np.int64), HISTOGRAM_BINS)
+            histogram += np.bincount(np.maximum(bins, 0), minlength=HISTOGRAM_BINS + 1)
+        total = histogram.sum()
+        if not total:
+            return {p: float('nan') for p in percentiles}
+        cumulative = np.cumsum(histogram)
+        return {p: (np.searchsorted(cumulative, total * p / 100) + 1) * HISTOGRAM_BIN for p in percentiles}
+
+    def summary(self):
+        """
+        Record counts per kind and overall timeout rate.
+        """
+        counts = np.zeros(3, dtype=np.int64)
+        for _, block in self.blocks(('kind',)):
+            counts += np.bincount(block['kind'], minlength=3)[:3]
+        answered = counts[RESPONSE] + counts[TIMEOUT]
+        return {
+            'prompts': int(counts[PROMPT]),
+            'responses': int(counts[RESPONSE]),
+            'timeouts': int(counts[TIMEOUT]),
+            'timeout_rate': counts[TIMEOUT] / answered if answered else 0.0,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize a session log.")
+    parser.add_argument("log", help="Session log written with --session-log")
+    parser.add_argument("--player", help="Restrict response-time percentiles to one player")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    log = SessionLog(args.log)
+    summary = log.summary()
+    print(f"Prompts: {summary['prompts']}  Responses: {summary['responses']}  "
+          f"Timeouts: {summary['timeouts']} ({summary['timeout_rate']:.1%})")
+    percentiles = log.response_time_percentiles(player=args.player)
+    print("Response time: " + "  ".join(f"p{p}={v * 1000:.0f}ms" for p, v in percentiles.items()))
+    for player, stats in sorted(log.player_stats().items()):
+        print(f"  {player}: accuracy {stats['accuracy']:.1%} over {stats['responses']} responses, "
+              f"timeouts {stats['timeout_rate']:.1%}, score {stats['score']:.1f}")
+    print(f"Analyzed in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,510 @@
+# session_router.py
+"""
+Standalone prototype of a sharded game server: rooms are spread over worker
+processes with a consistent hash ring, and each room runs the client's
+GameManager rules.
+
+It is not wired to TS/Server, which still runs a single game in one Node
+process, and nothing in the client imports it. It lives here because it
+reuses the Python game logic. Run it directly to measure throughput
+under a synthetic load.
+"""
+
+import argparse
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import random
+import time
+from queue import Empty
+
+from game_manager import GameManager
+from metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+
+class HashRing:
+    """
+    Consistent hash ring mapping room IDs to workers.
+
+    Every worker is placed on the ring at `replicas` pseudo-random points; a
+    room belongs to the first worker point at or after the room's hash. Adding
+    or removing a worker only moves the rooms on the arcs it gains or loses,
+    about 1/n of them, instead of reshuffling every room.
+    """
+
+    def __init__(self, replicas=64):
+        """
+        :param replicas: Points per worker; more points spread rooms more evenly
+        """
+        self.replicas = replicas
+        self.hashes = []  # Sorted ring positions
+        self.owners = {}  # Ring position -> worker ID
+        self.workers = set()
+
+    @staticmethod
+    def hash_key(key):
+        return int.from_bytes(hashlib.blake2b(str(key).encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def add(self, worker_id):
+        if worker_id in self.workers:
+            return
+        self.workers.add(worker_id)
+        for i in range(self.replicas):
+            point = self.hash_key(f"{worker_id}#{i}")
+            if point in self.owners:
+                continue  # Collision with another worker's point: keep the first owner
+            self.owners[point] = worker_id
+            bisect.insort(self.hashes, point)
+
+    def remove(self, worker_id):
+        if worker_id not in self.workers:
+            return
+        self.workers.discard(worker_id)
+        self.hashes = [point for point in self.hashes if self.owners[point] != worker_id]
+        self.owners = {point: self.owners[point] for point in self.hashes}
+
+    def owner(self, key):
+        """
+        :return: Worker ID owning the key, or None if the ring is empty
+        """
+        if not self.hashes:
+            return None
+        index = bisect.bisect_left(self.hashes, self.hash_key(key))
+        if index == len(self.hashes):
+            index = 0
+        return self.owners[self.hashes[index]]
+
+
+class RoomGameManager(GameManager):
+    """
+    Local-mode GameManager hosting one room inside a worker.
+
+    Prompts and results are sent back through the worker instead of a UI queue.
+    """
+
+    def __init__(self, room_id, worker, game_type):
+        super().__init__(game_type, mode='local', metric_labels={'room': room_id})
+        self.room_id = room_id
+        self.worker = worker
+
+    async def get_prompt_local(self):
+        await super().get_prompt_local()
+        self.worker.emit('prompt', self.room_id, {'round': self.current_round, 'prompt': self.prompt})
+
+    async def receive_response(self, player_id, user_gesture, response_time, confidence_score):
+        accepted = await super().receive_response(player_id, user_gesture, response_time, confidence_score)
+        if accepted:
+            self.worker.emit('result', self.room_id, {'round': self.current_round, 'player_id': player_id,
+                                                      'result_text': self.result_text,
+                                                      'round_score': self.round_score, 'score': self.score})
+        return accepted
+
+    def export_state(self):
+        """
+        State needed to resume the game on another worker. The round in progress is abandoned.
+        """
+        return {'game_type': self.game_type, 'total_rounds': self.total_rounds,
+                'current_round': self.current_round, 'score': self.score}
+
+
+class SessionWorker:
+    """
+    Worker process hosting rooms on one asyncio loop.
+
+    Reads batches of (kind, room_id, payload) messages from its inbox and
+    answers through the shared outbox, batching everything emitted during one
+    pass of the event loop into a single queue put.
+    """
+
+    def __init__(self, worker_id, inbox, outbox):
+        self.worker_id = worker_id
+        self.inbox = inbox
+        self.outbox = outbox
+        self.rooms = {}  # room_id -> RoomGameManager
+        self.tasks = {}  # room_id -> task running the game
+        self.outgoing = []
+        self.loop = None
+        self.running = True
+
+        self.events_counter = REGISTRY.counter('worker_events', 'Client events handled by this worker')
+        self.stale_counter = REGISTRY.counter('worker_stale_responses', 'Responses for a round that is no longer active')
+        REGISTRY.gauge('worker_rooms', 'Rooms hosted by this worker').set_function(lambda: len(self.rooms))
+
+    def emit(self, kind, room_id, payload):
+        if not self.outgoing:
+            self.loop.call_soon(self.flush)
+        self.outgoing.append((kind, room_id, payload))
+
+    def flush(self):
+        if self.outgoing:
+            self.outbox.put((self.worker_id, self.outgoing))
+            self.outgoing = []
+
+    async def run(self):
+        self.loop = asyncio.get_running_loop()
+        while self.running:
+            batch = await self.loop.run_in_executor(None, self.inbox.get)
+            for kind, room_id, payload in batch:
+                await self.handle(kind, room_id, payload)
+        for task in list(self.tasks.values()):
+            task.cancel()
+        self.flush()
+
+    async def handle(self, kind, room_id, payload):
+        self.events_counter.inc()
+        if kind == 'response':
+            room = self.rooms.get(room_id)
+            # Responses held during a migration belong to the abandoned round
+            if room is None or room.game_state != 'prompted' or payload.get('round') != room.current_round:
+                self.stale_counter.inc()
+                return
+            await room.receive_response(payload['player_id'], payload['gesture'],
+                                        room.time_since_prompt(), payload.get('confidence', 1.0))
+        elif kind == 'open':
+            await self.open_room(room_id, payload)
+        elif kind == 'export':
+            room = self.rooms.pop(room_id, None)
+            task = self.tasks.pop(room_id, None)
+            if task:
+                task.cancel()
+                room.game_loop_task.cancel()
+            if room:
+                room.release_metrics()
+            self.emit('exported', room_id, room.export_state() if room else None)
+        elif kind == 'metrics':
+            self.emit('metrics', None, collect_samples())
+        elif kind == 'stop':
+            self.running = False
+        else:
+            logger.warning(f"SessionWorker: Unknown event '{kind}' for room {room_id}.")
+
+    async def open_room(self, room_id, state):
+        room = RoomGameManager(room_id, self, state.get('game_type', 'rps'))
+        self.rooms[room_id] = room
+        await room.start_game(state.get('total_rounds', 5))
+        # The game loop has not run yet, so a migrated room resumes after its last finished round
+        room.current_round = state.get('current_round', 0)
+        room.score = state.get('score', 0)
+        self.tasks[room_id] = asyncio.create_task(self.run_room(room_id, room))
+
+    async def run_room(self, room_id, room):
+        await room.game_loop_task
+        if self.rooms.get(room_id) is room:
+            del self.rooms[room_id]
+            del self.tasks[room_id]
+            room.release_metrics()
+            self.emit('ended', room_id, {'score': room.score, 'rounds': room.current_round})
+
+
+def collect_samples(registry=REGISTRY):
+    """
+    :return: Dict of sample name -> value for every metric in the registry
+    """
+    with registry.lock:
+        metrics = list(registry.metrics.values())
+    return {name: value for metric in metrics for name, value in metric.samples()}
+
+
+def worker_main(worker_id, inbox, outbox, log_level=logging.WARNING):
+    logging.basicConfig(level=log_level, format=f'[%(asctime)s] %(levelname)s - {worker_id} - %(message)s')
+    asyncio.run(SessionWorker(worker_id, inbox, outbox).run())
+
+
+class SessionRouter:
+    """
+    Routes game rooms to a pool of worker processes by consistent hashing.
+
+    Each worker is a separate process running SessionWorker, so rooms are
+    spread over cores. Client events for a room are forwarded to the worker
+    that owns it; multiprocessing queues stand in for a message broker. When a
+    worker is added or removed, only the rooms whose owner changed on the ring
+    are migrated: the old worker exports the room's state, events for it are
+    held meanwhile, and the new owner resumes the game from that state.
+
+    The router is driven from a single thread: queue events with open_room()
+    and send(), push them with flush(), and collect worker output with poll().
+    """
+
+    def __init__(self, replicas=64, log_level=logging.WARNING):
+        """
+        :param replicas: Ring points per worker
+        :param log_level: Logging level inside the workers
+        """
+        self.ring = HashRing(replicas)
+        self.context = multiprocessing.get_context('spawn')
+        self.outbox = self.context.Queue()
+        self.log_level = log_level
+        self.workers = {}  # worker_id -> (process, inbox)
+        self.retiring = set()  # Workers removed from the ring, stopped once their rooms are exported
+        self.rooms = {}  # room_id -> owning worker_id
+        self.migrating = {}  # room_id -> events held until the room is exported
+        self.batches = {}  # worker_id -> events not yet flushed
+        self.next_worker = 0
+        self.metrics = {}  # worker_id -> last reported samples
+        self.held_events = []  # Worker events received by collect_metrics(), returned by the next poll()
+
+        self.forwarded_counter = REGISTRY.counter('router_events_forwarded', 'Client events forwarded to workers')
+        self.migrations_counter = REGISTRY.counter('router_room_migrations', 'Rooms moved between workers')
+        REGISTRY.gauge('router_workers', 'Active worker processes').set_function(lambda: len(self.ring.workers))
+        REGISTRY.gauge('router_rooms', 'Rooms routed to workers').set_function(lambda: len(self.rooms))
+
+    def add_worker(self):
+        """
+        Start a worker process and move its share of the rooms to it.
+
+        :return: The new worker's ID
+        """
+        worker_id = f"w{self.next_worker}"
+        self.next_worker += 1
+        inbox = self.context.Queue()
+        process = self.context.Process(target=worker_main, args=(worker_id, inbox, self.outbox, self.log_level),
+                                       name=f"session-{worker_id}", daemon=True)
+        process.start()
+        self.workers[worker_id] = (process, inbox)
+        self.ring.add(worker_id)
+        logger.info(f"SessionRouter: Added worker {worker_id} (pid {process.pid}).")
+        self.rebalance()
+        return worker_id
+
+    def remove_worker(self, worker_id):
+        """
+        Take a worker off the ring. Its rooms move to the remaining workers and
+        the process stops once they have all been exported.
+        """
+        if worker_id not in self.ring.workers:
+            return
+        self.ring.remove(worker_id)
+        self.retiring.add(worker_id)
+        logger.info(f"SessionRouter: Removing worker {worker_id}.")
+        self.rebalance()
+        self.stop_idle_retirees()
+
+    def rebalance(self):
+        """
+        Migrate every room whose ring owner is no longer the worker hosting it.
+
+        :return: Number of migrations started
+        """
+        moved = 0
+        for room_id, worker_id in self.rooms.items():
+            if room_id in self.migrating or self.ring.owner(room_id) == worker_id:
+                continue
+            self.migrating[room_id] = []
+            self.queue(worker_id, 'export', room_id, None)
+            moved += 1
+        if moved:
+            logger.info(f"SessionRouter: Migrating {moved} of {len(self.rooms)} rooms.")
+            self.flush()
+        return moved
+
+    def open_room(self, room_id, game_type='rps', rounds=5):
+        """
+        Start a game in a room on the worker that owns it.
+        """
+        worker_id = self.ring.owner(room_id)
+        if worker_id is None:
+            raise RuntimeError("SessionRouter has no workers")
+        self.rooms[room_id] = worker_id
+        self.queue(worker_id, 'open', room_id, {'game_type': game_type, 'total_rounds': rounds})
+
+    def send(self, room_id, kind, payload):
+        """
+        Forward a client event to the worker owning the room.
+
+        :return: False if the room is unknown
+        """
+        if room_id in self.migrating:
+            self.migrating[room_id].append((kind, room_id, payload))
+            return True
+        worker_id = self.rooms.get(room_id)
+        if worker_id is None:
+            return False
+        self.queue(worker_id, kind, room_id, payload)
+        return True
+
+    def queue(self, worker_id, kind, room_id, payload):
+        self.batches.setdefault(worker_id, []).append((kind, room_id, payload))
+
+    def flush(self):
+        """
+        Send queued events, one queue put per worker.
+        """
+        for worker_id, batch in self.batches.items():
+            if batch:
+                self.workers[worker_id][1].put(batch)
+                self.forwarded_counter.inc(len(batch))
+        self.batches = {}
+
+    def poll(self, timeout=0.1):
+        """
+        Receive worker output. Migration and metrics replies are handled here.
+
+        :param timeout: Seconds to wait for the first batch
+        :return: List of (kind, room_id, payload) for 'prompt', 'result' and 'ended' events
+        """
+        events, self.held_events = self.held_events, []
+        try:
+            item = self.outbox.get(timeout=0 if events else timeout)
+            while True:
+                worker_id, batch = item
+                for kind, room_id, payload in batch:
+                    if kind == 'exported':
+                        self.finish_migration(room_id, payload)
+                    elif kind == 'metrics':
+                        self.metrics[worker_id] = payload
+                    else:
+                        if kind == 'ended':
+                            self.rooms.pop(room_id, None)
+                        events.append((kind, room_id, payload))
+                item = self.outbox.get_nowait()
+        except Empty:
+            pass
+        self.flush()
+        self.stop_idle_retirees()
+        return events
+
+    def finish_migration(self, room_id, state):
+        held = self.migrating.pop(room_id, [])
+        if state is None:
+            # The game ended on the old worker before the export arrived
+            self.rooms.pop(room_id, None)
+            return
+        worker_id = self.ring.owner(room_id)
+        self.rooms[room_id] = worker_id
+        self.queue(worker_id, 'open', room_id, state)
+        for kind, _, payload in held:
+            self.queue(worker_id, kind, room_id, payload)
+        self.migrations_counter.inc()
+
+    def stop_idle_retirees(self):
+        for worker_id in list(self.retiring):
+            if any(owner == worker_id for owner in self.rooms.values()):
+                continue
+            process, inbox = self.workers.pop(worker_id)
+            inbox.put([('stop', None, None)])
+            process.join(timeout=5)
+            self.retiring.discard(worker_id)
+            logger.info(f"SessionRouter: Worker {worker_id} stopped.")
+
+    def collect_metrics(self, timeout=2.0):
+        """
+        Ask every worker for its metrics and aggregate them.
+
+        Counters, histogram buckets and gauges are summed over workers. Room
+        gauges such as game_score carry a room label, so each room is its own
+        sample and only appears on the worker hosting it.
+
+        :return: Tuple of (totals, per-worker samples), each a dict of sample name -> value.
+            Other worker events received meanwhile are returned by the next poll().
+        """
+        self.metrics = {}
+        for worker_id in self.workers:
+            self.queue(worker_id, 'metrics', None, None)
+        self.flush()
+        deadline = time.monotonic() + timeout
+        held = []
+        while len(self.metrics) < len(self.workers) and time.monotonic() < deadline:
+            held.extend(self.poll(timeout=max(0.0, deadline - time.monotonic())))
+        self.held_events = held + self.held_events
+        totals = {}
+        for samples in self.metrics.values():
+            for name, value in samples.items():
+                totals[name] = totals.get(name, 0) + value
+        return totals, dict(self.metrics)
+
+    def close(self):
+        for worker_id, (process, inbox) in self.workers.items():
+            inbox.put([('stop', None, None)])
+        for process, inbox in self.workers.values():
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.workers = {}
+        logger.info("SessionRouter: Closed.")
+
+
+def run_load(workers, rooms, seconds, add_worker_at=None, seed=0):
+    """
+    Play games in many rooms with scripted clients that answer every prompt at once.
+
+    :param workers: Initial number of worker processes
+    :param rooms: Concurrent rooms
+    :param seconds: Duration of the run
+    :param add_worker_at: Seconds into the run at which one more worker is added, or None
+    :return: Dict with rounds per second, prompt-to-result latency percentiles, migrations and metrics
+    """
+    rng = random.Random(seed)
+    router = SessionRouter()
+    migrations_before = router.migrations_counter.value
+    for _ in range(workers):
+        router.add_worker()
+    for i in range(rooms):
+        router.open_room(f"room-{i}", rounds=10 ** 9)
+    router.flush()
+
+    prompt_sent = {}
+    latencies = []
+    results = 0
+    start = time.perf_counter()
+    # Workers spawn slowly; count only once every room has delivered a prompt
+    measuring = False
+    while time.perf_counter() - start < seconds + (0 if measuring else 30):
+        for kind, room_id, payload in router.poll():
+            now = time.perf_counter()
+            if kind == 'prompt':
+                prompt_sent[room_id] = now
+                router.send(room_id, 'response', {'round': payload['round'], 'player_id': room_id,
+                                                  'gesture': rng.choice(('Rock', 'Paper', 'Scissors')),
+                                                  'confidence': 0.9})
+            elif kind == 'result' and measuring:
+                results += 1
+                latencies.append(now - prompt_sent.pop(room_id, now))
+        router.flush()
+        if not measuring and len(prompt_sent) == rooms:
+            measuring = True
+            start = time.perf_counter()
+        if measuring and add_worker_at is not None and time.perf_counter() - start >= add_worker_at:
+            add_worker_at = None
+            router.add_worker()
+    elapsed = time.perf_counter() - start
+    totals, per_worker = router.collect_metrics()
+    router.close()
+
+    latencies.sort()
+    def percentile(p):
+        return latencies[min(len(latencies) - 1, int(p * len(latencies)))] if latencies else 0.0
+    return {
+        'rounds_per_second': results / elapsed,
+        'p50': percentile(0.5),
+        'p99': percentile(0.99),
+        'migrations': router.migrations_counter.value - migrations_before,
+        'rooms_per_worker': {worker_id: samples.get('worker_rooms', 0) for worker_id, samples in per_worker.items()},
+        'responses_accepted': totals.get('game_responses_accepted_total', 0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure session throughput across worker processes (standalone prototype, not used by TS/Server).")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4], help="Worker counts to compare")
+    parser.add_argument("--rooms", type=int, default=256, help="Concurrent rooms")
+    parser.add_argument("--seconds", type=float, default=5.0, help="Measured duration per worker count")
+    parser.add_argument("--add-worker-at", type=float,
+                        help="Add one worker this many seconds into each run to exercise rebalancing")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='[%(asctime)s] %(levelname)s - %(message)s')
+    print(f"{args.rooms} rooms, {multiprocessing.cpu_count()} cores")
+    print(f"{'workers':>8}{'rounds/s':>12}{'p50 ms':>9}{'p99 ms':>9}{'migrated':>10}  rooms per worker")
+    for workers in args.workers:
+        r = run_load(workers, args.rooms, args.seconds, args.add_worker_at)
+        spread = ' '.join(f"{worker_id}={rooms:.0f}" for worker_id, rooms in sorted(r['rooms_per_worker'].items()))
+        print(f"{workers:>8}{r['rounds_per_second']:>12,.0f}{r['p50'] * 1000:>9.1f}{r['p99'] * 1000:>9.1f}"
+              f"{r['migrations']:>10.0f}  {spread}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+# simulation.py
+
+import argparse
+import asyncio
+import logging
+import random
+import selectors
+import time
+
+from game_manager import GameManager, correct_gesture
+from session_log import SessionRecorder
+
+logger = logging.getLogger(__name__)
+
+
+class VirtualClock:
+    """
+    Manually advanced clock used in place of the wall clock.
+    """
+
+    def __init__(self, start=0.0):
+        self.now = start
+
+    def time(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class VirtualTimeSelector:
+    """
+    Selector wrapper that advances a VirtualClock instead of blocking.
+
+    Ready I/O (e.g. call_soon_threadsafe wakeups) is still polled for real;
+    when nothing is ready, time jumps straight to the next scheduled timer.
+    """
+
+    def __init__(self, clock, selector=None):
+        self.clock = clock
+        self.selector = selector or selectors.DefaultSelector()
+
+    def select(self, timeout=None):
+        events = self.selector.select(0)
+        if events:
+            return events
+        if timeout is None:
+            # Nothing scheduled: only outside I/O can make progress
+            return self.selector.select(None)
+        if timeout > 0:
+            self.clock.advance(timeout)
+        return []
+
+    def __getattr__(self, name):
+        return getattr(self.selector, name)
+
+
+class VirtualTimeEventLoop(asyncio.SelectorEventLoop):
+    """
+    Event loop whose time() is a VirtualClock, so sleeps and timeouts complete instantly.
+    """
+
+    def __init__(self, clock=None):
+        self.clock = clock or VirtualClock()
+        super().__init__(VirtualTimeSelector(self.clock))
+
+    def time(self):
+        return self.clock.time()
+
+
+class ScriptedPlayer:
+    """
+    Produces responses for simulated rounds.
+
+    A script is either a list of (delay, gesture, confidence) tuples consumed one
+    per round, or a callable taking (prompt, game_type, rng) and returning such
+    a tuple. A delay of None means the player does not respond that round.
+    """
+
+    def __init__(self, script, seed=None):
+        self.script = iter(script) if not callable(script) else script
+        self.rng = random.Random(seed)
+
+    def next_response(self, prompt, game_type):
+        if callable(self.script):
+            return self.script(prompt, game_type, self.rng)
+        return next(self.script, (None, None, 0.0))
+
+
+def random_policy(accuracy=0.8, mean_delay=1.0, miss_rate=0.05):
+    """
+    Build a script callable answering correctly with the given accuracy.
+
+    :param accuracy: Probability of showing the correct gesture (see game_manager.correct_gesture)
+    :param mean_delay: Mean response delay in seconds (exponentially distributed)
+    :param miss_rate: Probability of not responding at all
+    """
+    def policy(prompt, game_type, rng):
+        if rng.random() < miss_rate:
+            return None, None, 0.0
+        if game_type == 'rps':
+            choices = ['Rock', 'Paper', 'Scissors']
+        else:
+            choices = [str(n) for n in range(1, 6)]
+        correct = correct_gesture(game_type, prompt)
+        if rng.random() < accuracy:
+            gesture = correct
+        else:
+            gesture = rng.choice([c for c in choices if c != correct])
+        return rng.expovariate(1.0 / mean_delay), gesture, rng.uniform(0.6, 1.0)
+    return policy
+
+
+class SimulatedGameManager(GameManager):
+    """
+    Local-mode GameManager whose prompts are answered by a ScriptedPlayer.
+    """
+
+    def __init__(self, game_type, player, clock=None, rng=None):
+        super().__init__(game_type, mode='local', clock=clock, rng=rng)
+        self.player = player
+        self.response_task = None
+        self.rounds = []  # (round, prompt, gesture, response_time, accepted, round_score)
+
+    async def get_prompt_local(self):
+        if self.response_task:
+            self.response_task.cancel()
+        await super().get_prompt_local()
+        delay, gesture, confidence = self.player.next_response(self.prompt, self.game_type)
+        if delay is None:
+            self.rounds.append((self.current_round, self.prompt, None, None, False, 0))
+            return
+        self.response_task = asyncio.create_task(self.respond(delay, gesture, confidence))
+
+    async def respond(self, delay, gesture, confidence):
+        await asyncio.sleep(delay)
+        response_time = self.clock() - self.prompt_time
+        accepted = await self.receive_response(self.player_id, gesture, response_time, confidence)
+        self.rounds.append((self.current_round, self.prompt, gesture, response_time, accepted,
+                            self.round_score if accepted else 0))
+
+
+async def run_game(game_manager, total_rounds):
+    await game_manager.start_game(total_rounds)
+    await game_manager.game_loop_task
+    if game_manager.response_task:
+        # A response scheduled after the last round's timeout is never delivered
+        game_manager.response_task.cancel()
+
+
+def simulate(game_type='rps', total_rounds=1000, seed=0, script=None, session_log=None):
+    """
+    Run a full local game on a virtual clock.
+
+    :param game_type: 'rps' or 'counting'
+    :param total_rounds: Number of rounds to play
+    :param seed: Seed for both the prompt generator and the scripted player
+    :param script: ScriptedPlayer script; defaults to random_policy()
+    :param session_log: Optional path to record the session events to
+    :return: Dict with per-round results and summary statistics
+    """
+    loop = VirtualTimeEventLoop()
+    player = ScriptedPlayer(script or random_policy(), seed=seed + 1)
+    game_manager = SimulatedGameManager(game_type, player, clock=loop.time, rng=random.Random(seed))
+    if session_log:
+        game_manager.session_recorder = SessionRecorder(session_log)
+    start = time.perf_counter()
+    try:
+        loop.run_until_complete(run_game(game_manager, total_rounds))
+        if game_manager.session_recorder:
+            loop.run_until_complete(game_manager.session_recorder.aclose())
+    finally:
+        loop.close()
+    wall_seconds = time.perf_counter() - start
+
+    accepted = sum(1 for r in game_manager.rounds if r[4])
+    return {
+        'rounds': game_manager.rounds,
+        'score': game_manager.score,
+        'responses': accepted,
+        'timeouts': total_rounds - accepted,
+        'virtual_seconds': loop.clock.time(),
+        'wall_seconds': wall_seconds,
+        'rounds_per_second': total_rounds / max(wall_seconds, 1e-9),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate GameManager rounds on a virtual clock.")
+    parser.add_argument("game_type", choices=["rps", "counting"], help="Type of the game")
+    parser.add_argument("--rounds", type=int, default=1000, help="Number of rounds to simulate")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    parser.add_argument("--accuracy", type=float, default=0.8, help="Scripted player accuracy")
+    parser.add_argument("--mean-delay", type=float, default=1.0, help="Scripted player mean response delay (s)")
+    parser.add_argument("--miss-rate", type=float, default=0.05, help="Probability the player does not respond")
+    parser.add_argument("--session-log", help="Record the simulated session to this session log")
+    parser.add_argument("--verbose", action="store_true", help="Log every round")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=logging.INFO if args.verbose else logging.ERROR,
+        format='[%(asctime)s] %(levelname)s - %(message)s'
+    )
+    result = simulate(args.game_type, args.rounds, args.seed,
+                      random_policy(args.accuracy, args.mean_delay, args.miss_rate), args.session_log)
+    print(f"Rounds: {args.rounds}  Responses: {result['responses']}  Timeouts: {result['timeouts']}")
+    print(f"Score: {result['score']:.1f}")
+    print(f"Virtual time: {result['virtual_seconds']:.1f}s  Wall time: {result['wall_seconds']:.3f}s  "
+          f"({result['rounds_per_second']:.0f} rounds/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# state_sync.py
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class StateSync:
+    """
+    Versioned local replica of the server's score table and this player's round results.
+
+    The server sends one 'state_snapshot' when a client joins and then a
+    'state_delta' per change, each carrying the version it applies on top of
+    ('base') and the version it produces. A delta holds only the players and
+    fields that changed. A delta whose base is not the local version means
+    updates were missed; the replica then needs a full resync, and deltas
+    arriving meanwhile are buffered and replayed on top of the snapshot.
+
+    Round results are only of interest to the player they belong to, so the
+    server sends them to that player alone ('round_result') rather than in
+    the broadcast deltas.
+    """
+
+    def __init__(self):
+        self.version = None  # None until the first snapshot
+        self.scores = {}  # player_id -> {'score', 'wins', 'losses', 'ties'}
+        self.results = {}  # player_id -> {'round', 'result_text', 'round_score'} of its last scored round
+        self.round = None
+        self.resyncing = False
+        self.pending = []  # Deltas received while waiting for a snapshot
+
+    def apply_snapshot(self, snapshot):
+        """
+        Replace the replica with a full snapshot and replay buffered deltas.
+
+        :param snapshot: {'version', 'scores', 'round'}
+        :return: Set of player IDs whose entries may have changed, or None if a
+            buffered delta revealed another gap
+        """
+        self.version = snapshot['version']
+        self.scores = {player_id: dict(fields) for player_id, fields in snapshot.get('scores', {}).items()}
+        self.round = snapshot.get('round')
+        self.resyncing = False
+        logger.info(f"StateSync: Snapshot at version {self.version} with {len(self.scores)} players.")
+
+        changed = set(self.scores)
+        pending, self.pending = self.pending, []
+        for i, delta in enumerate(pending):
+            if delta['version'] <= self.version:
+                continue
+            result = self.apply_delta(delta)
+            if result is None:
+                # Keep the deltas not replayed yet for the next snapshot
+                self.pending.extend(pending[i + 1:])
+                return None
+            changed |= result
+        return changed
+
+    def apply_delta(self, delta):
+        """
+        Apply a delta if it follows the local version.
+
+        :param delta: {'base', 'version', 'round', 'scores', 'removed'}
+        :return: Set of changed player IDs (empty for stale or buffered deltas), or
+            None on a version gap, in which case the caller must request a snapshot
+        """
+        if self.version is None or self.resyncing:
+            self.pending.append(delta)
+            return set()
+        if delta['version'] <= self.version:
+            return set()  # Already included in the replica
+        if delta['base'] != self.version:
+            logger.warning(f"StateSync: Version gap (have {self.version}, delta based on {delta['base']}).")
+            self.resyncing = True
+            self.pending.append(delta)
+            return None
+
+        changed = set()
+        for player_id, fields in delta.get('scores', {}).items():
+            self.scores.setdefault(player_id, {}).update(fields)
+            changed.add(player_id)
+        for player_id in delta.get('removed', []):
+            self.scores.pop(player_id, None)
+            self.results.pop(player_id, None)
+            changed.add(player_id)
+        self.round = delta.get('round', self.round)
+        self.version = delta['version']
+        return changed
+
+    def apply_result(self, player_id, result):
+        """
+        Store a round result addressed to this client.
+
+        :return: Set with the player ID
+        """
+        self.results[player_id] = dict(result)
+        return {player_id}
+
+    def rank(self, player_id):
+        """
+        1-based rank of a player by score, or None if unknown.
+        """
+        entry = self.scores.get(player_id)
+        if entry is None:
+            return None
+        score = entry.get('score', 0)
+        return 1 + sum(1 for other in self.scores.values() if other.get('score', 0) > score)
@@ -0,0 +1,7 @@
+# conftest.py
+
+import os
+import sys
+
+# The client modules are flat scripts in TS/Client, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,125 @@
+# test_landmark_recording.py
+
+import asyncio
+import random
+
+import numpy as np
+import pytest
+
+from game_manager import GameManager
+from landmark_recording import LandmarkRecorder, LandmarkReplay
+
+FPS = 30
+
+
+def hand(open_fingers):
+    """
+    Synthetic (21, 3) landmarks with each finger tip above (open) or below (closed) its base joint.
+    """
+    pts = np.full((21, 3), 0.5, dtype=np.float32)
+    for tip, base, is_open in zip((4, 8, 12, 16, 20), (3, 5, 9, 13, 17), open_fingers):
+        pts[tip, 1] = 0.2 if is_open else 0.8
+        pts[base, 1] = 0.5
+    return pts
+
+
+POSES = {'Rock': hand([0, 0, 0, 0, 0]), 'Paper': hand([1, 1, 1, 1, 1]), 'Scissors': hand([0, 1, 1, 0, 0])}
+
+
+def record(path, segments):
+    """
+    Record (pose, seconds) segments at FPS; a pose of None is a frame without a hand.
+    """
+    recorder = LandmarkRecorder(path)
+    frame = 0
+    for pose, seconds in segments:
+        for _ in range(int(seconds * FPS)):
+            if pose is None:
+                recorder.record(frame / FPS)
+            else:
+                recorder.record(frame / FPS, POSES[pose], 'Right', pose)
+            frame += 1
+    recorder.close()
+
+
+def test_record_replay_round_trip(tmp_path):
+    path = str(tmp_path / 'session.lmrec')
+    record(path, [(None, 0.2), ('Rock', 0.5), ('Paper', 0.5), (None, 0.1)])
+
+    replay = LandmarkReplay(path)
+    frames = list(replay.frames())
+    assert len(replay) == len(frames) == 39
+    assert [timestamp for timestamp, _, _, _ in frames] == pytest.approx([i / FPS for i in range(39)])
+    assert list(replay.gestures) == ['None'] * 6 + ['Rock'] * 15 + ['Paper'] * 15 + ['None'] * 3
+    for timestamp, hands, handedness, gesture in frames:
+        if gesture == 'None':
+            assert hands is None and handedness is None
+        else:
+            assert handedness == 'Right'
+            np.testing.assert_array_equal(hands[0].array, POSES[gesture])
+
+
+def test_replay_rejects_foreign_files(tmp_path):
+    path = tmp_path / 'not_a_recording.lmrec'
+    path.write_bytes(b'\x00' * 64)
+    with pytest.raises(ValueError):
+        LandmarkReplay(str(path))
+
+
+class PoseDetector:
+    """
+    Detector double for replay_game: commits the recorded pose on every frame with a hand.
+    """
+
+    def __init__(self):
+        self.current_gesture = 'None'
+        self.gesture_confidence = 0
+
+    def process_landmarks(self, hands, timestamp):
+        self.current_gesture = 'None'
+        self.gesture_confidence = 0
+        if hands:
+            for name, pose in POSES.items():
+                if np.array_equal(hands[0].array, pose):
+                    self.current_gesture = name
+                    self.gesture_confidence = 1.0
+
+
+class LimitedGameManager(GameManager):
+    """
+    Local GameManager that stops prompting after total_rounds, so later responses are rejected.
+    """
+
+    async def get_prompt_local(self):
+        if self.current_round <= self.total_rounds:
+            await super().get_prompt_local()
+
+
+def test_replay_game_counts_only_accepted_responses(tmp_path):
+    path = str(tmp_path / 'session.lmrec')
+    record(path, [('Rock', 1.0), (None, 0.5), ('Scissors', 1.0)])
+    game_manager = LimitedGameManager(game_type='rps', mode='local', rng=random.Random(0))
+    game_manager.total_rounds = 3
+
+    responses = asyncio.run(LandmarkReplay(path).replay_game(PoseDetector(), game_manager))
+
+    assert responses == 3
+    assert game_manager.game_state == 'responded'
+
+
+def test_replay_through_gesture_detector_matches_recording(tmp_path):
+    mp = pytest.importorskip('mediapipe')
+    if not hasattr(mp, 'solutions'):
+        pytest.skip("mediapipe build without the solutions API")
+    from gesture_detection import GestureDetector
+
+    path = str(tmp_path / 'session.lmrec')
+    record(path, [(None, 0.2), ('Rock', 0.5), ('Scissors', 0.5), ('Paper', 0.5)])
+    detector = GestureDetector(mode='rps')
+    detector.landmark_filter = None
+    try:
+        replay = LandmarkReplay(path)
+        predicted = [detector.process_landmarks(hands, timestamp) for timestamp, hands, _, _ in replay.frames()]
+    finally:
+        detector.release()
+    assert predicted == list(replay.gestures)
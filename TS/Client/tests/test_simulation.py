@@ -0,0 +1,55 @@
+# test_simulation.py
+
+import random
+
+from game_manager import correct_gesture
+from simulation import SimulatedGameManager, ScriptedPlayer, VirtualTimeEventLoop, random_policy, run_game
+
+
+def play(game_type, total_rounds, seed, script):
+    """
+    Play a game on a VirtualTimeEventLoop and return the GameManager and the virtual time taken.
+    """
+    loop = VirtualTimeEventLoop()
+    player = ScriptedPlayer(script, seed=seed + 1)
+    game_manager = SimulatedGameManager(game_type, player, clock=loop.time, rng=random.Random(seed))
+    try:
+        loop.run_until_complete(run_game(game_manager, total_rounds))
+    finally:
+        loop.close()
+    return game_manager, loop.clock.time()
+
+
+def accepted(game_manager):
+    return sum(1 for r in game_manager.rounds if r[4])
+
+
+def test_correct_answers_score_exactly():
+    # Every round answered correctly after 0.5s with confidence 0.9:
+    # (0.9 * 0.7 + (3 - 0.5) / 3 * 0.3) * 100 = 88 points per rps round
+    script = lambda prompt, game_type, rng: (0.5, correct_gesture(game_type, prompt), 0.9)
+    game_manager, virtual_seconds = play('rps', 20, seed=1, script=script)
+    assert game_manager.current_round == 20
+    assert accepted(game_manager) == 20
+    assert abs(game_manager.score - 20 * 88) < 1e-9
+    assert abs(virtual_seconds - 20 * 0.5) < 1e-9
+
+
+def test_missed_rounds_time_out():
+    script = lambda prompt, game_type, rng: (None, None, 0.0)
+    game_manager, virtual_seconds = play('counting', 20, seed=1, script=script)
+    assert game_manager.current_round == 20
+    assert accepted(game_manager) == 0
+    assert game_manager.score == 0
+    assert abs(virtual_seconds - 20 * game_manager.response_timeout) < 1e-9
+
+
+def test_random_policy_is_repeatable():
+    first, first_seconds = play('rps', 200, seed=7, script=random_policy())
+    second, second_seconds = play('rps', 200, seed=7, script=random_policy())
+    assert first.rounds == second.rounds
+    assert first.score == second.score
+    assert first_seconds == second_seconds
+    assert first.current_round == 200
+    assert accepted(first) == 181
+    assert round(first.score, 4) == 13944.0672
@@ -0,0 +1,112 @@
+# thread_limits.py
+
+import argparse
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+# Thread pool sizes read by OpenMP, BLAS and TensorFlow Lite builds when they initialize
+THREAD_ENV_VARS = (
+    'OMP_NUM_THREADS',
+    'OPENBLAS_NUM_THREADS',
+    'MKL_NUM_THREADS',
+    'NUMEXPR_NUM_THREADS',
+    'TF_NUM_INTRAOP_THREADS',
+    'TF_NUM_INTEROP_THREADS',
+)
+
+
+def thread_env(threads):
+    """
+    :return: Dict setting every variable in THREAD_ENV_VARS to `threads`
+    """
+    return {name: str(threads) for name in THREAD_ENV_VARS}
+
+
+def preload_thread_env(argv):
+    """
+    Export the thread-count variables for a '--threads N' option in argv.
+
+    OpenMP, OpenBLAS and TensorFlow Lite read these variables once, when
+    they load, so this must run before numpy, cv2 or mediapipe is imported.
+    Everything else in argv is ignored; the script's own parser handles it.
+
+    :param argv: Command line arguments, without the program name
+    :return: The requested thread count, or None
+    """
+    parser = argparse.ArgumentParser(add_help=False, allow_abbrev=False)
+    parser.add_argument("--threads", type=int)
+    args, _ = parser.parse_known_args(argv)
+    if args.threads is not None:
+        os.environ.update(thread_env(args.threads))
+    return args.threads
+
+
+def parse_cpu_list(text):
+    """
+    Parse a CPU list such as '0-3,6' (the taskset/cgroup format).
+
+    :return: Sorted list of CPU indices
+    """
+    cpus = set()
+    for part in text.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            cpus.update(range(int(first), int(last) + 1))
+        else:
+            cpus.add(int(part))
+    return sorted(cpus)
+
+
+def available_cpus():
+    """
+    :return: Sorted list of CPUs this process may run on
+    """
+    if hasattr(os, 'sched_getaffinity'):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def apply_thread_limits(threads=None, cpus=None):
+    """
+    Cap internal thread pools and pin the calling thread to a set of CPUs.
+
+    threads sets OpenCV's pool (which parallelizes resize, cvtColor and
+    GaussianBlur) at once. It also exports the thread-count variables, but
+    by now numpy and cv2 are loaded, so those only reach child processes
+    started afterwards. To cap this process's OpenMP/BLAS/TFLite pools, call
+    preload_thread_env before the imports, as main.py does.
+
+    On Linux the CPU mask applies to the calling thread and is inherited by
+    every thread it starts afterwards. Call this before creating the
+    MediaPipe graph and the client's own threads so they all stay on the
+    given CPUs. MediaPipe's solution API has no thread-count option, so
+    pinning is what bounds its threads.
+
+    :param threads: Threads per pool (None leaves the library defaults)
+    :param cpus: Iterable of CPU indices to pin to (None leaves the mask unchanged)
+    :return: True if every requested limit was applied
+    """
+    import cv2
+
+    applied = True
+    if threads is not None:
+        cv2.setNumThreads(threads)
+        os.environ.update(thread_env(threads))
+    if cpus is not None:
+        cpus = sorted(set(cpus))
+        if hasattr(os, 'sched_setaffinity'):
+            try:
+                os.sched_setaffinity(0, cpus)
+            except OSError as e:
+                logger.error(f"ThreadLimits: Cannot pin to CPUs {cpus}: {e}")
+                applied = False
+        else:
+            logger.warning("ThreadLimits: CPU pinning is not supported on this platform.")
+            applied = False
+    logger.info(f"ThreadLimits: OpenCV threads {cv2.getNumThreads()}, CPUs {available_cpus()}.")
+    return applied
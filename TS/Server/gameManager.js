@@ -13,6 +13,7 @@ class GameManager {
     this.gameState = {
       promptInterval: 3000, // 3 seconds
       responseTimeout: 7000, // 7 seconds
+      promptLeadTime: 1000, // Prompts are announced 1 second before they start
       currentPrompt: null,
       state: "waiting", // 'waiting', 'prompted', 'responded'
       responses: [],
@@ -21,13 +22,30 @@ class GameManager {
       currentRound: 0, // Tracks the current round
     };
     this.playerScores = {}; // { player_id: { score, wins, losses, ties } }
+
+    // Versioned state sync for clients that joined with state_sync: a snapshot on
+    // join, then one 'state_delta' per change with only the changed players and fields.
+    // Round results go only to the player they belong to ('round_result').
+    this.stateVersion = 0;
+    this.syncedScores = {}; // Score table as of stateVersion
+    this.dirtyPlayers = new Set();
+    this.removedPlayers = new Set();
   }
 
-  addClient(socket, player_id) {
+  addClient(socket, player_id, stateSync = false) {
     this.clients[socket.id] = { player_id, socket };
     this.connectedPlayers.push(player_id);
     socket.join("game"); // Join the 'game' room for Game Testers
     this.initializePlayerScore(player_id);
+    this.dirtyPlayers.add(player_id);
+    this.removedPlayers.delete(player_id);
+    this.emitStateDelta();
+    if (stateSync) {
+      socket.join("state_sync");
+      socket.emit("state_snapshot", this.stateSnapshot());
+    } else {
+      socket.join("scores_full"); // Legacy clients get full 'player_scores' and 'result' payloads
+    }
     this.broadcastPlayerList();
     // Send the active game type to the client
     socket.emit("game_type", { gameType: this.activeGameType });
@@ -46,6 +64,9 @@ class GameManager {
       if (index !== -1) {
         this.connectedPlayers.splice(index, 1);
       }
+      this.dirtyPlayers.delete(player_id);
+      this.removedPlayers.add(player_id);
+      this.emitStateDelta();
       this.broadcastPlayerList();
 
       // Emit updated client list to Admin Dashboard
@@ -128,6 +149,10 @@ class GameManager {
     this.connectedPlayers = [];
     // Reset player scores
     this.playerScores = {};
+    this.syncedScores = {};
+    this.dirtyPlayers.clear();
+    this.removedPlayers.clear();
+    this.stateVersion += 1; // Any client still holding older state must resync
     console.log(`Game '${this.activeGameType}' reset.`);
     // Notify all clients to reset
     this.io.to("game").emit("reset");
@@ -141,7 +166,8 @@ class GameManager {
       type: "info",
     });
 
-    // Emit updated player scores to Admin Dashboard and Game Testers
+    // Emit the cleared scores to Admin Dashboard and Game Testers
+    this.broadcastAdminScores();
     this.broadcastPlayerScores();
   }
   updateConfig(promptInterval, responseTimeout) {
@@ -176,7 +202,7 @@ class GameManager {
           this.stopGame(); // Automatically stop the game after reaching totalRounds
         }
       }
-    }, this.gameState.promptInterval + this.gameState.responseTimeout + 2000);
+    }, this.gameState.promptInterval + this.gameState.promptLeadTime + this.gameState.responseTimeout + 2000);
   }
 
   stopGame() {
@@ -218,11 +244,15 @@ class GameManager {
 
     // Calculate relative timeout
     const responseTimeout = this.gameState.responseTimeout; // 7000ms
+    // Announce the prompt ahead of its start so clients can arm on time
+    const promptLeadTime = this.gameState.promptLeadTime;
+    const goAt = Date.now() + promptLeadTime;
 
     // Broadcast prompt to all Game Testers
     this.io.to("game").emit("prompt", {
       prompt: this.gameState.currentPrompt,
       responseTimeout: responseTimeout,
+      goAt: goAt, // Server time (ms since epoch) at which the round starts
       currentRound: this.gameState.currentRound, // Added current round
       totalRounds: this.gameState.totalRounds, // Added total rounds
     });
@@ -232,6 +262,7 @@ class GameManager {
     this.io.to("admins").emit("admin_round_started", {
       prompt: this.gameState.currentPrompt,
       countdownDuration: countdownDuration,
+      goAt: goAt,
       currentRound: this.gameState.currentRound, // Optionally send current round number
       totalRounds: this.gameState.totalRounds, // Optionally send total rounds
     });
@@ -239,7 +270,7 @@ class GameManager {
     // Set a timeout to collect responses
     setTimeout(() => {
       this.collectResponses();
-    }, responseTimeout);
+    }, promptLeadTime + responseTimeout);
   }
 
   collectResponses() {
@@ -305,12 +336,30 @@ class GameManager {
       });
     });
 
-    // Broadcast results to all Game Testers
-    this.io.to("game").emit("result", {
+    // Broadcast results to legacy Game Testers
+    this.io.to("scores_full").emit("result", {
       results: results,
     });
 
-    // Send updated player scores to Admin Dashboard and Game Testers
+    // State-sync clients get their own result and one score delta per round
+    const syncSockets = {};
+    Object.values(this.clients).forEach(({ player_id, socket }) => {
+      if (socket.rooms.has("state_sync")) {
+        syncSockets[player_id] = socket;
+      }
+    });
+    results.forEach(({ player_id, result_text, round_score }) => {
+      if (syncSockets[player_id]) {
+        syncSockets[player_id].emit("round_result", {
+          round: this.gameState.currentRound,
+          result_text,
+          round_score,
+        });
+      }
+    });
+    this.emitStateDelta();
+
+    // Send updated player scores to legacy Game Testers
     this.broadcastPlayerScores();
 
     this.gameState.state = "waiting";
@@ -347,13 +396,64 @@ class GameManager {
     } else if (outcome === "Tie") {
       playerScore.ties += 1;
     }
+    // The admin dashboard follows every response; players get one delta per round from collectResponses
+    this.broadcastAdminScores();
+    this.dirtyPlayers.add(player_id);
+  }
 
-    // Emit updated player scores to Admin Dashboard and Game Testers
-    this.broadcastPlayerScores();
+  emitStateDelta() {
+    // Only the fields that differ from the last synced table are sent
+    const scores = {};
+    this.dirtyPlayers.forEach((player_id) => {
+      const current = this.playerScores[player_id];
+      if (!current) {
+        return;
+      }
+      const synced = this.syncedScores[player_id] || {};
+      const changed = {};
+      Object.keys(current).forEach((field) => {
+        if (current[field] !== synced[field]) {
+          changed[field] = current[field];
+        }
+      });
+      if (Object.keys(changed).length > 0 || !this.syncedScores[player_id]) {
+        scores[player_id] = changed;
+      }
+      this.syncedScores[player_id] = { ...current };
+    });
+    const removed = [...this.removedPlayers];
+    removed.forEach((player_id) => {
+      delete this.syncedScores[player_id];
+    });
+    this.dirtyPlayers.clear();
+    this.removedPlayers.clear();
+    if (Object.keys(scores).length === 0 && removed.length === 0) {
+      return;
+    }
+
+    const delta = {
+      base: this.stateVersion,
+      version: this.stateVersion + 1,
+      round: this.gameState.currentRound,
+      scores,
+    };
+    if (removed.length > 0) {
+      delta.removed = removed;
+    }
+    this.stateVersion += 1;
+    this.io.to("state_sync").emit("state_delta", delta);
   }
 
-  broadcastPlayerScores() {
-    const scores = this.connectedPlayers.map((player_id) => {
+  stateSnapshot() {
+    return {
+      version: this.stateVersion,
+      round: this.gameState.currentRound,
+      scores: this.syncedScores,
+    };
+  }
+
+  playerScoresTable() {
+    return this.connectedPlayers.map((player_id) => {
       const playerScore = this.playerScores[player_id] || {
         score: 0,
         wins: 0,
@@ -362,11 +462,18 @@ class GameManager {
       };
       return { player_id, ...playerScore };
     });
+  }
+
+  broadcastAdminScores() {
     this.io.to("admins").emit("admin_player_scores", {
-      scores,
+      scores: this.playerScoresTable(),
     });
-    this.io.to("game").emit("player_scores", {
-      scores,
+  }
+
+  broadcastPlayerScores() {
+    // Legacy full table; admins already got every change from broadcastAdminScores
+    this.io.to("scores_full").emit("player_scores", {
+      scores: this.playerScoresTable(),
     });
   }
 
@@ -8,12 +8,22 @@ const socketHandler = require("./socketHandler"); // Function to handle sockets
 
 const app = express();
 const server = http.createServer(app);
+// Transport tuning, overridable per deployment:
+//   SOCKET_TRANSPORTS           allowed transports (the admin dashboard needs polling as a fallback)
+//   SOCKET_PING_INTERVAL        ms between heartbeats; lower detects dropped clients sooner
+//   SOCKET_PING_TIMEOUT         ms to wait for a heartbeat reply before disconnecting
+//   SOCKET_PER_MESSAGE_DEFLATE  "1" to accept permessage-deflate on websocket frames
 const io = new Server(server, {
   cors: {
     //origin: "http://localhost:3000", // Adjust based on your setup
     origin: "*",
     methods: ["GET", "POST"],
   },
+  transports: (process.env.SOCKET_TRANSPORTS || "polling,websocket").split(","),
+  pingInterval: Number(process.env.SOCKET_PING_INTERVAL) || 25000,
+  pingTimeout: Number(process.env.SOCKET_PING_TIMEOUT) || 20000,
+  perMessageDeflate:
+    process.env.SOCKET_PER_MESSAGE_DEFLATE === "1" ? { threshold: 256 } : false,
 });
 
 // Correct instantiation using 'new'
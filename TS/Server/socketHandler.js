@@ -82,24 +82,42 @@ module.exports = (io, socket, gameManager) => {
 
   // Handle client joining the game (Game Tester)
   socket.on("join", (data) => {
-    const { player_id } = data;
+    const { player_id, state_sync } = data;
     console.log(`Player joined: ${player_id}`);
-    gameManager.addClient(socket, player_id);
+    gameManager.addClient(socket, player_id, Boolean(state_sync));
     io.emit("admin_message", {
       message: `Player '${player_id}' joined the game.`,
     });
   });
 
   // Handle player responses
-  socket.on("response", (data) => {
+  socket.on("response", (data, ack) => {
     const { player_id, gesture, response_time, confidence_score } = data;
     console.log(`Received 'response' event from Player ID: ${player_id}, Gesture: ${gesture}, Time: ${response_time}s, Confidence: ${confidence_score}`);
     gameManager.recordResponse(data);
+    // Acknowledge so clients can measure submit round-trip time
+    if (typeof ack === "function") {
+      ack({ received: true });
+    }
     io.emit("admin_message", {
       message: `Received response from '${player_id}'.`,
     });
   });
 
+  // Clock synchronization: reply with the server time so clients can estimate their offset
+  socket.on("time_sync", (data, ack) => {
+    if (typeof ack === "function") {
+      ack({ t0: data && data.t0, server_time: Date.now() });
+    }
+  });
+
+  // Full state snapshot for clients that detected a gap in the delta versions
+  socket.on("state_resync", (data, ack) => {
+    if (typeof ack === "function") {
+      ack(gameManager.stateSnapshot());
+    }
+  });
+
   // Handle game reset initiated by a client
   socket.on("reset", () => {
     console.log("Received 'reset' event from client.");